@@ -0,0 +1,141 @@
+import time
+from contextvars import ContextVar
+from crewai import LLM
+import litellm
+from typing import Any, Callable, Dict, List, Optional, Union
+from llm_cache import ResponseCache, get_response_cache
+from llm_gateway import get_gateway
+from metrics import current_run, estimate_usage
+
+# LLM attributes that change what the model returns, and so belong in the cache key
+SAMPLING_PARAMS = (
+    "temperature", "top_p", "n", "stop", "max_tokens", "max_completion_tokens",
+    "presence_penalty", "frequency_penalty", "seed", "response_format",
+)
+
+
+# Receives (agent role, text generated so far) while a streaming agent is producing output.
+# A context variable rather than an attribute, so concurrent runs sharing agents stay separate.
+token_sink: ContextVar[Optional[Callable[[str, str], None]]] = ContextVar("token_sink", default=None)
+
+
+class AgentLLM(LLM):
+    """crewai LLM that knows which agent it serves, so every agent call goes through one place."""
+
+    role: str = ""
+    # Whether partial output is pushed to the active token sink as it is generated
+    stream_output: bool = False
+
+    def __new__(cls, model: str, **kwargs):
+        # crewai's LLM factory hands some providers (Gemini included) to native SDK classes,
+        # which would bypass this subclass; always build this class on its litellm path instead
+        return object.__new__(cls)
+
+    def __init__(self, model: str, **kwargs):
+        kwargs.pop("is_litellm", None)
+        super().__init__(model=model, is_litellm=True, **kwargs)
+
+    def sampling_params(self) -> Dict[str, Any]:
+        params = {}
+        for name in SAMPLING_PARAMS:
+            value = getattr(self, name, None)
+            if value is not None and value != []:
+                params[name] = value
+        return params
+
+    @staticmethod
+    def normalize_messages(messages: Union[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        if isinstance(messages, str):
+            return [{"role": "user", "content": messages}]
+        return list(messages)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        run = current_run.get()
+        if run is None:
+            return self._call(messages, tools, callbacks, available_functions, **kwargs)[0]
+
+        start = time.perf_counter()
+        try:
+            response, origin = self._call(messages, tools, callbacks, available_functions, **kwargs)
+        except Exception:
+            # crewai retries failed calls by calling again, so each failure is one retry
+            run.record_llm_call(self.role, time.perf_counter() - start, failed=True)
+            raise
+        seconds = time.perf_counter() - start
+        prompt_tokens, completion_tokens, cost = estimate_usage(self.model, self.normalize_messages(messages), response)
+        run.record_llm_call(self.role, seconds, prompt_tokens, completion_tokens,
+                            cost if origin == "model" else 0.0, cached=origin == "cache", coalesced=origin == "coalesced")
+        return response
+
+    def _call(self, messages, tools, callbacks, available_functions, **kwargs):
+        """Returns the response and where it came from: "model", "cache", or "coalesced" (shared
+        from an identical call that was already in flight)."""
+        cache = get_response_cache()
+        gateway = get_gateway()
+        call_model = super().call
+        # Structured responses are parsed by crewai, so they always take its own path
+        sink = token_sink.get() if self.stream_output and kwargs.get("response_model") is None else None
+        messages = self.normalize_messages(messages)
+        # Tool-calling turns can run side effects, so only plain completions are cached, shared
+        # or streamed
+        if tools or (cache is None and sink is None and gateway is None):
+            send = lambda: call_model(messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs)
+            return (send() if gateway is None else gateway.call(self.model, self.role, messages, send)[0]), "model"
+
+        params = self.sampling_params()
+        # crewai can ask for a structured response; the schema changes the request
+        response_model = kwargs.get("response_model")
+        if response_model is not None:
+            params["response_model"] = response_model.__name__
+        key = ResponseCache.make_key(self.model, self.role, messages, params)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                if sink is not None:
+                    sink(self.role, cached)
+                return cached, "cache"
+
+        if sink is not None:
+            send = lambda: self._stream_completion(messages, sink)
+        else:
+            send = lambda: call_model(messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs)
+        shared = False
+        if gateway is None:
+            response = send()
+        else:
+            response, shared = gateway.call(self.model, self.role, messages, send, key=key)
+        if shared:
+            # The streamed text went to the caller whose call was shared; this one gets it whole
+            if sink is not None and isinstance(response, str):
+                sink(self.role, response)
+            return response, "coalesced"
+        if cache is not None and isinstance(response, str) and response:
+            cache.put(key, response, model=self.model, role=self.role)
+        return response, "model"
+
+    def _prepare_completion_params(self, *args, **kwargs) -> Dict[str, Any]:
+        params = super()._prepare_completion_params(*args, **kwargs)
+        gateway = get_gateway()
+        if gateway is not None:
+            params.setdefault("client", gateway.http_client)
+        return params
+
+    def _stream_completion(self, messages: List[Dict[str, Any]], sink: Callable[[str, str], None]) -> str:
+        params = {**(self.additional_params or {}), **self.sampling_params()}
+        # The same connection settings LLM._prepare_completion_params passes, so both paths reach one endpoint
+        for name in ("api_key", "api_base", "base_url", "api_version", "timeout"):
+            value = getattr(self, name, None)
+            if value is not None:
+                params[name] = value
+        gateway = get_gateway()
+        if gateway is not None:
+            params.setdefault("client", gateway.http_client)
+        text = ""
+        for chunk in litellm.completion(model=self.model, messages=messages, stream=True, **params):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                text += delta
+                sink(self.role, text)
+        return text
@@ -0,0 +1,85 @@
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from pipeline import PipelineAgents
+
+# Agent sets built once per process and reused across Streamlit sessions, reruns, batch job
+# descriptions and queued jobs. crewai agents keep per-execution state, so a set serves one run
+# at a time: a run leases a set and returns it when done, and a new set is built only when every
+# built one is in use, so a pool holds as many sets as the most runs it has seen at once.
+# pipeline (and with it crewai and litellm) is imported on first use, so a page load that never
+# runs the crew does not pay for those imports.
+
+
+class AgentPool:
+    def __init__(self, llm_identifier: str, verbose: bool = True):
+        self.llm_identifier = llm_identifier
+        self.verbose = verbose
+        self.built = 0
+        self.leases = 0
+        self._idle: List["PipelineAgents"] = []
+        self._priming = 0
+        self._lock = threading.Condition()
+
+    def _build(self) -> "PipelineAgents":
+        from pipeline import build_agents
+
+        agents = build_agents(self.llm_identifier, verbose=self.verbose)
+        with self._lock:
+            self.built += 1
+        return agents
+
+    def prime(self) -> None:
+        """Builds one set ahead of the first run, so that run does not wait for the imports."""
+        with self._lock:
+            self._priming += 1
+        try:
+            agents = self._build()
+            with self._lock:
+                self._idle.append(agents)
+        finally:
+            with self._lock:
+                self._priming -= 1
+                self._lock.notify_all()
+
+    @contextmanager
+    def lease(self) -> Iterator["PipelineAgents"]:
+        with self._lock:
+            # A run that arrives while the set is being primed waits for it rather than building another
+            self._lock.wait_for(lambda: self._idle or not self._priming)
+            agents = self._idle.pop() if self._idle else None
+            self.leases += 1
+        if agents is None:
+            agents = self._build()
+        try:
+            yield agents
+        finally:
+            with self._lock:
+                self._idle.append(agents)
+                self._lock.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"built": self.built, "leases": self.leases, "idle": len(self._idle)}
+
+
+_agent_pools: Dict[Tuple[str, bool], AgentPool] = {}
+_agent_pools_lock = threading.Lock()
+
+
+def get_agent_pool(llm_identifier: Optional[str] = None, verbose: bool = True) -> Optional[AgentPool]:
+    """Returns the process-wide pool for `llm_identifier` (by default the configured Gemini
+    model), or None when no model is configured."""
+    if llm_identifier is None:
+        from pipeline import configure_llm
+
+        llm_identifier = configure_llm()
+        if llm_identifier is None:
+            return None
+    with _agent_pools_lock:
+        key = (llm_identifier, verbose)
+        if key not in _agent_pools:
+            _agent_pools[key] = AgentPool(llm_identifier, verbose=verbose)
+        return _agent_pools[key]
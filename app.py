@@ -5,13 +5,21 @@ try:
 except ImportError:
     pass
 import streamlit as st
-from crewai import Agent, Task, Crew, Process
 from dotenv import load_dotenv
 import os
-import tempfile # To handle uploaded files
-import litellm
-from job_app_tools import ResumeParserTool # Import your custom tool
-from models import ResumeDetails, JobDescriptionDetails # Import Pydantic models
+import time
+import queue
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+# crewai, litellm and pypdf take seconds to import, so the modules that use them (pipeline,
+# crew_scheduler, context_builder, agent_llm) are imported where a crew actually runs
+from agent_pool import get_agent_pool
+from document_parsing import PARSE_STAGE, parse_resume_bytes
+from llm_cache import get_response_cache
+from job_queue import FAILED, QUEUED, RUNNING, STAGE_DONE, STAGE_RESTORED, STAGE_RUNNING, STAGE_SKIPPED, SUCCEEDED, QueueFullError, get_job_queue, start_worker_pool
+from metrics import record_stage_time, track_run
+from profile_store import get_profile_store
 
 # --- Streamlit UI Configuration ---
 # Must be the first Streamlit command
@@ -20,88 +28,54 @@ st.set_page_config(page_title="AI Job Application Assistant", layout="wide")
 # --- LLM Configuration ---
 load_dotenv()
 
-# Configure your preferred LLM (e.g., Gemini or OpenAI)
-# Example for Gemini:
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    TARGET_LLM_MODEL = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash-latest")
-    litellm.register_model({
-        "gemini/" + TARGET_LLM_MODEL: {
-            "model_name": TARGET_LLM_MODEL,
-            "litellm_provider": "gemini",
-            "api_key": GEMINI_API_KEY,
-        }
-    })
-    agent_llm_identifier = f"gemini/{TARGET_LLM_MODEL}"
-
-# st.info(f"Using LLM: {agent_llm_identifier}")
-
-# --- Initialize Tools ---
-resume_parser_tool = ResumeParserTool()
+# The Gemini model is registered with litellm (pipeline.configure_llm) when the first crew runs
+if not os.getenv("GEMINI_API_KEY"):
+    st.error("GEMINI_API_KEY is not set. Add it to your .env file to use the assistant.")
+    st.stop()
+
+# "parallel" runs independent tasks concurrently based on each Task's context;
+# "sequential" keeps the original one-task-at-a-time crew.
+CREW_EXECUTION_MODE = os.getenv("CREW_EXECUTION_MODE", "parallel").lower()
+
+# "borderline" asks the LLM for a match assessment only when the local score is too close to call,
+# "local" never does and "llm" always does.
+MATCH_ANALYSIS_MODE = os.getenv("MATCH_ANALYSIS_MODE", "borderline").lower()
+
+# "native" extracts the resume and job description analyses in one structured-output call each,
+# validated and repaired locally; "crewai" keeps crewai's own output_pydantic flow.
+STRUCTURED_EXTRACTION_MODE = os.getenv("STRUCTURED_EXTRACTION_MODE", "native").lower()
+
+# "queue" hands each run to a worker process through the job queue, so runs survive reruns and
+# at most JOB_WORKERS crews run at once; "inline" runs the crew in this script's session.
+JOB_EXECUTION_MODE = os.getenv("JOB_EXECUTION_MODE", "queue").lower()
+# Workers started alongside the app; set to 0 when they run separately (python job_worker.py)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# "background" imports the pipeline and builds one agent set on a thread once the server starts,
+# so the first inline run or refinement does not wait for it; "lazy" waits for the first run.
+AGENT_WARMUP_MODE = os.getenv("AGENT_WARMUP_MODE", "background").lower()
 
 # --- Define Agents ---
-resume_analyzer_agent = Agent(
-    role='Resume Analyzer',
-    goal='Extract and understand the key skills, experiences (including roles, responsibilities, achievements), education, and qualifications from the provided resume text.',
-    backstory='An expert HR professional skilled in quickly identifying candidate strengths and qualifications from diverse resume formats.',
-    llm=agent_llm_identifier,
-    verbose=True,
-    allow_delegation=False
-)
-
-job_description_analyzer_agent = Agent(
-    role='Job Description Deconstructor',
-    goal='Thoroughly analyze the provided job description to identify key requirements, essential skills (technical and soft), desired qualifications, company culture hints, and the core responsibilities of the role.',
-    backstory='A meticulous analyst specializing in deconstructing job postings to pinpoint exactly what employers are seeking in an ideal candidate.',
-    llm=agent_llm_identifier,
-    verbose=True,
-    allow_delegation=False
-)
-
-resume_tailoring_advisor_agent = Agent(
-    role='Strategic Resume Tailoring Advisor',
-    goal='Compare the candidate\'s analyzed resume against the analyzed job description. Provide specific, actionable advice on how to tailor the resume to best match the job requirements. This includes suggesting keywords, highlighting relevant experiences, and bridging any apparent gaps.',
-    backstory='A seasoned career coach with a strong track record of helping job seekers optimize their resumes to stand out by perfectly aligning them with specific job opportunities.',
-    llm=agent_llm_identifier,
-    verbose=True,
-    allow_delegation=False
-)
-
-cover_letter_drafter_agent = Agent(
-    role='Persuasive Cover Letter Drafter',
-    goal='Draft a compelling and personalized cover letter. The letter must highlight the candidate\'s most relevant skills and experiences (from their resume analysis) and directly address the requirements outlined in the job description analysis. The tone should be professional, enthusiastic, and tailored to the specific company and role.',
-    backstory='A skilled writer and communication expert specializing in crafting persuasive cover letters that capture attention and make candidates memorable.',
-    llm=agent_llm_identifier,
-    verbose=True,
-    allow_delegation=False
-)
-
-resume_editor_agent = Agent(
-    role='Expert Resume Editor',
-    goal='Rewrite and reformat the provided resume text based on specific tailoring advice to perfectly align it with a given job description. The output should be the full text of the revised resume.',
-    backstory='A meticulous resume writer with a talent for transforming standard resumes into compelling, job-specific documents that highlight a candidate\'s strengths and experiences in the context of a particular role.',
-    llm=agent_llm_identifier,
-    verbose=True,
-    allow_delegation=False
-)
-
-initial_match_analyzer_agent = Agent(
-    role='Initial Resume-JD Match Analyzer',
-    goal="Provide a quick, high-level assessment of how well a candidate's resume (ResumeDetails JSON) matches a job description (JobDescriptionDetails JSON). Output a qualitative match level (e.g., Strong, Moderate, Needs Improvement) and 2-3 key points highlighting strengths or gaps.",
-    backstory="An efficient HR screener adept at quickly identifying the initial fit between a resume and a job posting based on structured data.",
-    llm=agent_llm_identifier,
-    verbose=True,
-    allow_delegation=False
-)
-
-section_refiner_agent = Agent(
-    role='Resume Section Refinement Specialist',
-    goal="Rewrite a specific section of a resume based on a user's explicit instruction to improve its impact, clarity, or focus. The output should be only the refined text for that section.",
-    backstory="A detail-oriented editor skilled at making targeted improvements to resume content, ensuring each part is as effective as possible.",
-    llm=agent_llm_identifier,
-    verbose=True,
-    allow_delegation=False
-)
+# Built once per server process and leased per run (agent_pool), not rebuilt on every rerun
+@st.cache_resource
+def agent_warmup():
+    warmup = threading.Thread(target=lambda: get_agent_pool().prime(), daemon=True)
+    warmup.start()
+    return warmup
+
+# In queue mode the workers run the crews and this process only runs refinements, which need a
+# tailored resume first
+if AGENT_WARMUP_MODE == "background" and (JOB_EXECUTION_MODE != "queue" or st.session_state.get("tailored_resume_output")):
+    agent_warmup()
+
+# --- Job Workers ---
+@st.cache_resource
+def job_worker_pool():
+    # Once per server process, shared by every session
+    return start_worker_pool(JOB_WORKERS) if JOB_WORKERS > 0 else None
+
+if JOB_EXECUTION_MODE == "queue":
+    job_worker_pool()
 
 # --- Initialize Session State ---
 if "advice_output_display" not in st.session_state:
@@ -118,6 +92,8 @@ if "refinement_instruction" not in st.session_state:
     st.session_state.refinement_instruction = ""
 if "refined_section_output" not in st.session_state:
     st.session_state.refined_section_output = ""
+if "stage_timings_report" not in st.session_state:
+    st.session_state.stage_timings_report = ""
 
 # --- Streamlit UI ---
 st.title("🚀 AI Job Application Assistant")
@@ -139,106 +115,127 @@ def clear_results():
     st.session_state.cover_letter_output = ""
     st.session_state.initial_match_assessment = ""
     st.session_state.refined_section_output = "" 
+    st.session_state.stage_timings_report = ""
+    st.session_state.job_error = ""
+    st.query_params.pop("job", None)
+
+def run_with_streaming(run, placeholders):
+    """Runs `run` on a worker thread and renders streamed partial outputs into `placeholders`
+    (keyed by agent role) from the script thread until it finishes. Returns `run`'s result and
+    the seconds until the first streamed text for each role."""
+    from agent_llm import token_sink
+
+    updates = queue.Queue()
+    run_context = contextvars.copy_context()
+    run_context.run(token_sink.set, lambda role, text: updates.put((role, text)))
+    started = time.perf_counter()
+    first_token_seconds = {}
+    with ThreadPoolExecutor(max_workers=1) as runner:
+        future = runner.submit(run_context.run, run)
+        while not future.done() or not updates.empty():
+            latest = {}
+            try:
+                role, text = updates.get(timeout=0.1)
+                latest[role] = text
+                while True:
+                    role, text = updates.get_nowait()
+                    latest[role] = text
+            except queue.Empty:
+                pass
+            for role, text in latest.items():
+                first_token_seconds.setdefault(role, time.perf_counter() - started)
+                # Hide the agent's "Thought:" preamble once the final answer starts arriving
+                placeholders[role](text.split("Final Answer:", 1)[-1].strip())
+        return future.result(), first_token_seconds
 
 if st.button("✨ Get Application Assistance", use_container_width=True):
     if uploaded_resume is not None and job_description.strip():
         # Clear previous results before starting a new run
         clear_results()
         with st.status("🚀 Kicking off the AI job assistant...", expanded=True) as status_ui:
-            # Save uploaded file temporarily to pass its path to the tool
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_resume.name)[1]) as tmp_file:
-                tmp_file.write(uploaded_resume.getvalue())
-                resume_file_path = tmp_file.name
-            
             resume_text_content = "" # To store parsed resume text
             try:
                 status_ui.update(label="📄 Parsing resume...", state="running")
-                # Parse resume using the tool
-                st.write(f"Attempting to parse resume from: {resume_file_path}")
-                resume_text_content = resume_parser_tool.run(file_path=resume_file_path)
+                # Parse the upload in memory; identical files are served from the shared text cache.
+                # No run is open yet, so the time is recorded into the run that follows.
+                parse_started = time.perf_counter()
+                resume_text_content = parse_resume_bytes(uploaded_resume.getvalue(), uploaded_resume.name)
+                parse_seconds = time.perf_counter() - parse_started
 
                 if "Error:" in resume_text_content:
                     st.error(f"Resume Parsing Failed: {resume_text_content}")
                     st.stop()
                 
                 st.success("Resume parsed successfully!")
-                status_ui.update(label="🔍 Analyzing resume and job description...", state="running")
-
-                # Define Tasks
-                task_analyze_resume = Task(
-                    description=f"Analyze the following resume text. Extract key information such as work experience (roles, companies, dates, responsibilities, achievements), skills (technical and soft), education (degree, institution, graduation date), and any projects or certifications. Present this as a structured summary.\n\nResume Text:\n```\n{resume_text_content}\n```",
-                    expected_output="A JSON object conforming to the ResumeDetails Pydantic model. Ensure all fields are accurately populated based on the resume content. For work experiences, list each role with company, duration, and key achievements/responsibilities as a list of strings.",
-                    agent=resume_analyzer_agent,
-                    output_pydantic=ResumeDetails
-                )
-
-                task_analyze_job_description = Task(
-                    description=f"Analyze the following job description. Identify and list the key requirements, essential technical skills, desired soft skills, educational qualifications, years of experience needed, company values or culture hints (if mentioned), and the main responsibilities of the role.\n\nJob Description:\n```\n{job_description}\n```",
-                    expected_output="A JSON object conforming to the JobDescriptionDetails Pydantic model. Populate all fields based on the provided job description, ensuring lists are used where appropriate (e.g., for skills, responsibilities).",
-                    agent=job_description_analyzer_agent,
-                    output_pydantic=JobDescriptionDetails
-                )
-
-                task_initial_match_analysis = Task(
-                    description="Based on the structured ResumeDetails (JSON) and JobDescriptionDetails (JSON) from the previous tasks, provide a brief, high-level analysis of the initial match. State a qualitative match level (e.g., 'Strong Match', 'Moderate Match', 'Needs Significant Tailoring') and list 2-3 bullet points identifying key strengths or major gaps. Keep the assessment concise.",
-                    expected_output="A short paragraph stating the match level, followed by 2-3 bullet points. For example: 'Initial Assessment: Moderate Match. \n- Strength: Relevant experience in X. \n- Gap: Missing explicit mention of Y skill required by JD.'",
-                    agent=initial_match_analyzer_agent,
-                    context=[task_analyze_resume, task_analyze_job_description]
-                )
-
-                task_tailor_resume_advice = Task(
-                    description=f"You will receive structured information: the candidate's resume details (as a JSON object conforming to ResumeDetails model) and the job description details (as a JSON object conforming to JobDescriptionDetails model) from previous analysis tasks. Your task is to compare these two. Based on this comparison, provide specific, actionable advice on how to tailor the resume to best match the job requirements. Your advice should be a list of bullet points covering: \n1. Keywords from the JobDescriptionDetails (e.g., from 'must_have_skills', 'key_responsibilities') that should be incorporated into the resume. \n2. Specific skills and experiences from the ResumeDetails (e.g., from 'work_experiences', 'skills') that should be emphasized or elaborated on to match the JobDescriptionDetails. \n3. Any potential gaps between the ResumeDetails and JobDescriptionDetails and how they might be addressed (e.g., highlighting transferable skills). \n4. Suggestions for rephrasing certain points in the resume for better alignment.",
-                    expected_output="A clear, bulleted list of actionable recommendations for tailoring the resume. Each recommendation should be specific and justified by referencing parts of the job description or resume.",
-                    agent=resume_tailoring_advisor_agent,
-                    context=[task_analyze_resume, task_analyze_job_description]
-                )
-
-                task_draft_cover_letter = Task(
-                    description="Using the analyzed resume, the analyzed job description, and the resume tailoring advice (all from context), draft a professional and engaging cover letter. The letter should: \n1. Clearly state the position being applied for. \n2. Briefly introduce the candidate. \n3. Highlight 2-3 key qualifications and experiences from the resume that directly align with the most important requirements of the job description. \n4. Express enthusiasm for the role and the company. \n5. End with a clear call to action. \nEnsure the tone is professional and tailored.",
-                    expected_output="A complete, well-structured draft of a cover letter. It should include a salutation, an introduction, body paragraphs (2-3) demonstrating suitability by referencing specific details from the contextual ResumeDetails (JSON) and JobDescriptionDetails (JSON), and a professional closing. The letter should be ready to be slightly edited and sent by the user.",
-                    agent=cover_letter_drafter_agent,
-                    context=[task_analyze_resume, task_analyze_job_description, task_tailor_resume_advice]
-                )
-
-                task_edit_resume = Task(
-                    description="You are provided with the original resume text, the analysis of the job description, and specific tailoring advice. Your goal is to rewrite the *original* resume text by carefully integrating *all* the specific suggestions from the tailoring advice. Maintain the overall structure and sections of the original resume (e.g., Contact Information, Summary/Objective, Experience, Education, Skills). For each work experience entry, revise the bullet points to incorporate keywords and highlight achievements relevant to the job description, as suggested by the tailoring advice. Ensure consistent formatting using clear headings and bullet points (using '*' or '-'). The final output must be the complete, tailored resume text, professionally formatted, in plain text, ready for copy-pasting, with no markdown syntax.",
-                    expected_output="The complete, tailored resume text in PLAIN TEXT format. It should be a revised version of the original resume, incorporating the tailoring advice, maintaining a standard resume structure with clear sections and bullet points, and containing NO MARKDOWN formatting whatsoever.",
-                    agent=resume_editor_agent,
-                    context=[task_analyze_resume, task_analyze_job_description, task_tailor_resume_advice]
-                )
-
-                # Create and Run the Crew
-                job_application_crew = Crew(
-                    agents=[resume_analyzer_agent, job_description_analyzer_agent, initial_match_analyzer_agent, resume_tailoring_advisor_agent, resume_editor_agent, cover_letter_drafter_agent],
-                    tasks=[task_analyze_resume, task_analyze_job_description, task_initial_match_analysis, task_tailor_resume_advice, task_edit_resume, task_draft_cover_letter],
-                    process=Process.sequential,
-                    verbose=True 
-                )
-
-                status_ui.update(label="🤖 AI crew is processing... (This may take a few moments)", state="running")
-                crew_result = job_application_crew.kickoff()
-
-                # Store results in session state
-                st.session_state.initial_match_assessment = str(task_initial_match_analysis.output) if task_initial_match_analysis.output else ""
-                status_ui.update(label="💡 Generating tailoring advice...", state="running")
-                st.session_state.advice_output_display = str(task_tailor_resume_advice.output) if task_tailor_resume_advice.output else ""
-                st.session_state.tailored_resume_output = str(task_edit_resume.output) if task_edit_resume.output else ""
-                st.session_state.cover_letter_output = str(crew_result) if crew_result else ""
 
+                if JOB_EXECUTION_MODE == "queue":
+                    # A worker runs the crew; the job id in the URL lets a refresh pick the job up again
+                    job_id = get_job_queue().submit({
+                        "resume_text": resume_text_content,
+                        "job_description": job_description,
+                        "execution_mode": CREW_EXECUTION_MODE,
+                        "match_analysis_mode": MATCH_ANALYSIS_MODE,
+                        "extraction_mode": STRUCTURED_EXTRACTION_MODE,
+                        "parse_seconds": parse_seconds,
+                    })
+                    st.query_params["job"] = job_id
+                    status_ui.update(label="📨 Submitted to the job queue.", state="complete", expanded=False)
+                else:
+                    from crewai import Crew, Process
+                    from context_builder import build_task_context
+                    from crew_scheduler import run_task_graph
+                    from pipeline import build_tasks, match_analysis_gate, restore_analyses, save_analyses, structured_executor, application_outputs, format_run_report
+
+                    with track_run("pipeline", execution_mode=CREW_EXECUTION_MODE) as run_metrics, get_agent_pool().lease() as agents:
+                        record_stage_time(PARSE_STAGE, parse_seconds)
+                        status_ui.update(label="🔍 Analyzing resume and job description...", state="running")
+
+                        # Define Tasks
+                        tasks = build_tasks(agents, resume_text_content, job_description)
+                        # Analyses of a resume or job description seen before are reused instead of re-run
+                        profile_store = get_profile_store()
+                        restored_stages = restore_analyses(tasks, resume_text_content, job_description, profile_store)
+                        pending_tasks = tasks.pending()
+
+                        status_ui.update(label="🤖 AI crew is processing... (This may take a few moments)", state="running")
+                        # Live views for the long outputs, filled in as tokens arrive
+                        st.caption("📄 Tailored resume (live)")
+                        live_resume = st.empty()
+                        st.caption("✉️ Cover letter (live)")
+                        live_cover_letter = st.empty()
+                        live_placeholders = {
+                            agents.resume_editor.role: live_resume.text,
+                            agents.cover_letter_drafter.role: live_cover_letter.markdown,
+                        }
+                        schedule_result = None
+                        if CREW_EXECUTION_MODE == "sequential":
+                            # Create and Run the Crew
+                            job_application_crew = Crew(
+                                agents=[task.agent for task in pending_tasks],
+                                tasks=pending_tasks,
+                                process=Process.sequential,
+                                verbose=True 
+                            )
+                            _, first_token_seconds = run_with_streaming(job_application_crew.kickoff, live_placeholders)
+                        else:
+                            # Run every task as soon as the tasks in its context have finished
+                            schedule_result, first_token_seconds = run_with_streaming(lambda: run_task_graph(pending_tasks, should_run=match_analysis_gate(tasks, MATCH_ANALYSIS_MODE), build_context=build_task_context, execute=structured_executor(tasks, STRUCTURED_EXTRACTION_MODE)), live_placeholders)
+                        save_analyses(tasks, resume_text_content, job_description, profile_store)
+                        st.session_state.stage_timings_report = format_run_report(tasks, restored_stages, schedule_result, first_token_seconds, run_metrics)
+
+                    # Store results in session state
+                    status_ui.update(label="💡 Generating tailoring advice...", state="running")
+                    st.session_state.update(application_outputs(tasks))
+                    status_ui.update(label="✅ All tasks complete!", state="complete", expanded=False)
+
+            except QueueFullError as e:
+                st.error(f"The assistant is busy right now: {e}")
+                status_ui.update(label="❗ Job queue is full.", state="error", expanded=False)
             except Exception as e:
                 st.error(f"An error occurred during the AI processing: {e}")
                 import traceback
                 status_ui.update(label="❗ Error during processing.", state="error", expanded=False)
                 st.error(traceback.format_exc())
-            finally:
-                # Clean up the temporary file
-                if 'resume_file_path' in locals() and os.path.exists(resume_file_path):
-                    try:
-                        os.remove(resume_file_path)
-                        st.write(f"Temporary file {resume_file_path} removed.")
-                    except Exception as e_rm:
-                        st.warning(f"Could not remove temporary file {resume_file_path}: {e_rm}")
-            status_ui.update(label="✅ All tasks complete!", state="complete", expanded=False)
     elif not uploaded_resume and not job_description.strip() and (st.session_state.get("tailored_resume_output") or st.session_state.get("cover_letter_output")):
         # This case is to prevent warning if only download button is clicked on a page with existing results
         pass
@@ -247,11 +244,65 @@ if st.button("✨ Get Application Assistance", use_container_width=True):
         if not st.session_state.get("tailored_resume_output") and not st.session_state.get("cover_letter_output"):
             st.warning("⚠️ Please upload your resume and paste the job description to proceed.")
 
+STAGE_ICONS = {STAGE_RUNNING: "⏳", STAGE_DONE: "✅", STAGE_SKIPPED: "⏭️", STAGE_RESTORED: "♻️"}
+
+@st.fragment(run_every=1)
+def show_job_progress(job_id):
+    """Polls the queued job once a second until it finishes, then loads its results."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.query_params.pop("job", None)
+        st.warning("That job is no longer available; please run the assistant again.")
+        return
+    if job.status in (SUCCEEDED, FAILED):
+        if job.status == SUCCEEDED:
+            st.session_state.update(job.result)
+        else:
+            st.session_state.job_error = job.error
+        st.session_state.loaded_job = job_id
+        st.rerun()
+    if job.status == QUEUED:
+        ahead = get_job_queue().position(job_id)
+        st.info(f"⏳ Waiting for a free worker ({ahead} job{'s' if ahead != 1 else ''} ahead)...")
+        return
+    st.info("🤖 AI crew is processing... You can refresh this page; the job keeps running.")
+    for stage, state in job.progress.items():
+        st.write(f"{STAGE_ICONS.get(state, '')} {stage}")
+    for role, text in job.partial.items():
+        st.caption(f"{role} (live)")
+        # Hide the agent's "Thought:" preamble once the final answer starts arriving
+        st.text(text.split("Final Answer:", 1)[-1].strip())
+
+# A job id in the URL is a queued run whose results this session has not loaded yet
+queued_job_id = st.query_params.get("job")
+if JOB_EXECUTION_MODE == "queue" and queued_job_id and st.session_state.get("loaded_job") != queued_job_id:
+    show_job_progress(queued_job_id)
+
+if st.session_state.get("job_error"):
+    st.error(f"An error occurred during the AI processing: {st.session_state.job_error}")
+
 if st.session_state.get("advice_output_display") or st.session_state.get("tailored_resume_output") or st.session_state.get("cover_letter_output") or st.session_state.get("initial_match_assessment"):
     st.button("🧹 Clear Results", on_click=clear_results, use_container_width=True, key="clear_button")
 
+llm_response_cache = get_response_cache()
+if llm_response_cache is not None:
+    cache_stats = llm_response_cache.stats()
+    st.sidebar.caption(f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} entries")
+profile_store = get_profile_store()
+if profile_store is not None:
+    store_stats = profile_store.stats()
+    st.sidebar.caption(f"Profile store: {store_stats['hits']} hits, {store_stats['misses']} misses, {store_stats['entries']} profiles")
+if JOB_EXECUTION_MODE == "queue":
+    queue_stats = get_job_queue().stats()
+    st.sidebar.caption(f"Job queue: {queue_stats[QUEUED]:g} waiting, {queue_stats[RUNNING]:g} running, "
+                       f"p95 wait {queue_stats['wait_seconds_p95']:.1f}s")
+
 # Display results from session state if they exist
 # This block will run on every script execution, including after button clicks.
+if st.session_state.get("stage_timings_report"):
+    with st.expander("⏱️ Stage timings"):
+        st.text(st.session_state.stage_timings_report)
+
 if st.session_state.get("initial_match_assessment"):
     st.markdown("---")
     st.subheader("🔍 Initial Resume vs. JD Assessment:")
@@ -307,17 +358,16 @@ if st.session_state.get("tailored_resume_output"): # Only show if a tailored res
 
     if st.button("✍️ Refine Section", key="refine_section_button"):
         if st.session_state.section_to_refine.strip() and st.session_state.refinement_instruction.strip():
-            with st.spinner("AI is refining the section..."):
-                task_refine_specific_section = Task(
-                    description=f"The user has provided the following resume section:\n```\n{st.session_state.section_to_refine}\n```\nAnd wants it refined with this instruction: '{st.session_state.refinement_instruction}'.\nRewrite the provided resume section based *only* on this instruction. Output *only* the refined section text.",
-                    expected_output="The refined text of the resume section, directly addressing the user's instruction. Output only the modified section, not any surrounding text or explanation.",
-                    agent=section_refiner_agent
-                )
+            with track_run("refinement"), st.spinner("AI is refining the section..."), get_agent_pool().lease() as agents:
+                from crewai import Crew
+                from pipeline import build_refinement_task
+
+                task_refine_specific_section = build_refinement_task(agents, st.session_state.section_to_refine, st.session_state.refinement_instruction)
                 
                 # For a single task, create a temporary crew to execute it
                 try:
                     refinement_crew = Crew(
-                        agents=[section_refiner_agent],
+                        agents=[agents.section_refiner],
                         tasks=[task_refine_specific_section],
                         verbose=False # less verbose for a single section refinement
                     )
@@ -0,0 +1,195 @@
+try:
+    __import__('pysqlite3')
+    import sys
+    sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+except ImportError:
+    pass
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import IO, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from context_builder import build_task_context
+from agent_pool import get_agent_pool
+from crew_scheduler import run_task_graph
+from job_app_tools import ResumeParserTool
+from match_scorer import score_text_match
+from metrics import track_run
+from pipeline import build_tasks, configure_llm, match_analysis_gate, restore_analyses, save_analyses, structured_executor
+from profile_store import get_profile_store
+
+# Headless batch mode: analyze one resume once, then run the job-description tasks
+# for many job descriptions concurrently and append one JSON line per job description.
+#
+#   python batch_runner.py --resume resume.pdf --jd jds/ --output results.jsonl --concurrency 8
+#
+# With --rank-only no model is called: every JD is scored locally and the JSONL is written
+# best match first.
+
+
+@dataclass
+class BatchSummary:
+    succeeded: int
+    failed: int
+    wall_time: float
+
+
+def load_job_descriptions(paths: Iterable[str]) -> List[Tuple[str, str]]:
+    """Reads (id, text) pairs from .txt/.md files, directories of them, or .jsonl files with `id` and `text` keys."""
+    job_descriptions = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith((".txt", ".md", ".jsonl")))
+            job_descriptions.extend(load_job_descriptions(files))
+        elif path.lower().endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    if line.strip():
+                        record = json.loads(line)
+                        job_descriptions.append((str(record.get("id", f"{path}:{line_number}")), record["text"]))
+        else:
+            with open(path, encoding="utf-8") as f:
+                job_descriptions.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    return job_descriptions
+
+
+def analyze_resume(resume_text: str, llm_identifier: str, extraction_mode: str = "native"):
+    """Runs the resume analysis once (or restores it from the profile store); the returned task is
+    shared as context by every job description."""
+    with get_agent_pool(llm_identifier).lease() as agents:
+        tasks = build_tasks(agents, resume_text, "")
+        store = get_profile_store()
+        if not restore_analyses(tasks, resume_text, "", store):
+            with track_run("batch_resume"):
+                run_task_graph([tasks.analyze_resume], execute=structured_executor(tasks, extraction_mode))
+            save_analyses(tasks, resume_text, "", store)
+    return tasks.analyze_resume
+
+
+def run_job_description(jd_id: str, job_description: str, task_analyze_resume, llm_identifier: str,
+                        match_analysis_mode: str = "borderline", extraction_mode: str = "native") -> dict:
+    started = time.perf_counter()
+    try:
+        # crewai agents keep per-execution state, so each job description leases its own set;
+        # the sets are built once per concurrent slot rather than once per job description
+        with get_agent_pool(llm_identifier).lease() as agents:
+            tasks = build_tasks(agents, "", job_description, task_analyze_resume=task_analyze_resume)
+            store = get_profile_store()
+            restore_analyses(tasks, "", job_description, store)
+            with track_run("batch_job_description", jd_id=jd_id) as run_metrics:
+                schedule_result = run_task_graph(tasks.pending(), should_run=match_analysis_gate(tasks, match_analysis_mode),
+                                               build_context=build_task_context, execute=structured_executor(tasks, extraction_mode))
+            save_analyses(tasks, "", job_description, store)
+        return {
+            "id": jd_id,
+            "status": "ok",
+            "latency_seconds": round(time.perf_counter() - started, 3),
+            "match_score": tasks.local_match_score.to_dict() if tasks.local_match_score else None,
+            "job_description_details": tasks.analyze_job_description.output.raw,
+            "initial_match_assessment": tasks.initial_match_analysis.output.raw if tasks.initial_match_analysis.output else None,
+            "tailoring_advice": tasks.tailor_resume_advice.output.raw,
+            "tailored_resume": tasks.edit_resume.output.raw,
+            "cover_letter": tasks.draft_cover_letter.output.raw,
+            "stage_seconds": {t.name: round(t.duration, 3) for t in schedule_result.timings},
+            "run_id": run_metrics.run_id,
+            "estimated_cost_usd": round(sum(stage.cost_usd for stage in run_metrics.stages.values()), 6),
+            "extraction_calls_saved_estimate": sum(result.estimated_calls_saved for result in tasks.extractions.values()),
+        }
+    except Exception as e:
+        return {
+            "id": jd_id,
+            "status": "error",
+            "latency_seconds": round(time.perf_counter() - started, 3),
+            "error": f"{type(e).__name__}: {e}",
+        }
+
+
+def rank_job_descriptions(resume_text: str, job_descriptions: List[Tuple[str, str]], output: IO[str]) -> BatchSummary:
+    """Scores every job description locally, with no model calls, and writes them best match first."""
+    started = time.perf_counter()
+    scored = sorted(
+        ({"id": jd_id, **score_text_match(resume_text, text).to_dict()} for jd_id, text in job_descriptions),
+        key=lambda record: -record["score"],
+    )
+    for rank, record in enumerate(scored, 1):
+        output.write(json.dumps({"rank": rank, **record}) + "\n")
+    output.flush()
+    return BatchSummary(succeeded=len(scored), failed=0, wall_time=time.perf_counter() - started)
+
+
+def run_batch(resume_text: str, job_descriptions: List[Tuple[str, str]], output: IO[str],
+              llm_identifier: str, concurrency: int = 4, match_analysis_mode: str = "borderline",
+              extraction_mode: str = "native") -> BatchSummary:
+    """Writes one JSON line to `output` per job description as soon as it finishes.
+
+    A failing job description is recorded with status "error" and does not stop the batch.
+    """
+    started = time.perf_counter()
+    task_analyze_resume = analyze_resume(resume_text, llm_identifier, extraction_mode)
+    succeeded = failed = 0
+    write_lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_job_description, jd_id, text, task_analyze_resume, llm_identifier, match_analysis_mode, extraction_mode)
+                   for jd_id, text in job_descriptions]
+        for future in as_completed(futures):
+            record = future.result()
+            if record["status"] == "ok":
+                succeeded += 1
+            else:
+                failed += 1
+            with write_lock:
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+    return BatchSummary(succeeded=succeeded, failed=failed, wall_time=time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run one resume against many job descriptions.")
+    parser.add_argument("--resume", required=True, help="Path to the resume (PDF or DOCX).")
+    parser.add_argument("--jd", required=True, nargs="+", help="Job description files, directories of .txt/.md files, or .jsonl files with 'id' and 'text'.")
+    parser.add_argument("--output", default="-", help="JSONL file to append results to ('-' for stdout).")
+    parser.add_argument("--concurrency", type=int, default=4, help="How many job descriptions to process at the same time.")
+    parser.add_argument("--match-analysis", choices=["borderline", "local", "llm"], default="borderline",
+                        help="When to ask the LLM for a match assessment on top of the local score.")
+    parser.add_argument("--extraction", choices=["native", "crewai"], default="native",
+                        help="How the resume and job description analyses are extracted.")
+    parser.add_argument("--rank-only", action="store_true", help="Only rank the job descriptions with the local scorer; no model calls.")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    llm_identifier = None
+    if not args.rank_only:
+        llm_identifier = configure_llm()
+        if not llm_identifier:
+            print("Error: GEMINI_API_KEY is not set.", file=sys.stderr)
+            return 2
+
+    with track_run("batch_parse", resume=args.resume):
+        resume_text = ResumeParserTool()._run(file_path=args.resume)
+    if resume_text.startswith("Error"):
+        print(resume_text, file=sys.stderr)
+        return 2
+    job_descriptions = load_job_descriptions(args.jd)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    try:
+        if args.rank_only:
+            summary = rank_job_descriptions(resume_text, job_descriptions, output)
+        else:
+            summary = run_batch(resume_text, job_descriptions, output, llm_identifier,
+                                concurrency=args.concurrency, match_analysis_mode=args.match_analysis,
+                                extraction_mode=args.extraction)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"{summary.succeeded} succeeded, {summary.failed} failed in {summary.wall_time:.1f}s", file=sys.stderr)
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
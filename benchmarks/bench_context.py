@@ -0,0 +1,106 @@
+import os
+
+# No network: use litellm's bundled tokenizer map
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+import argparse
+import sys
+import time
+from benchmarks.documents import resume_lines
+from benchmarks.report import finish, print_table, summarize
+from context_builder import TRUNCATION_MARKER, _LIST_CAPS, _cap_lists, compact_data, count_tokens, fit_context, truncate_to_budget
+from models import EducationDetail, JobDescriptionDetails, ResumeDetails, WorkExperience
+
+# Context fitting for the downstream tasks: first checks that tiny budgets still terminate and
+# fit, and that shortening structured context never drops a work experience or education entry,
+# then times fit_context at decreasing budgets.
+#
+#   python -m benchmarks.bench_context --iterations 50
+
+SMALL_BUDGETS = (0, 1, 2, 5, 10, 20)
+BUDGETS = (4000, 2000, 1000, 500)
+
+
+def _resume() -> ResumeDetails:
+    lines = resume_lines(90)
+    return ResumeDetails(
+        summary="Backend engineer with eight years of Python and data platform work.",
+        work_experiences=[
+            WorkExperience(role=f"Engineer {i + 1}", company=f"Company {i + 1}", duration="2018 - 2020",
+                           responsibilities=lines[i * 15:(i + 1) * 15])
+            for i in range(6)
+        ],
+        skills=[f"Skill {i + 1}" for i in range(40)],
+        education_details=[
+            EducationDetail(degree=f"Degree {i + 1}", institution=f"University {i + 1}", graduation_date="2018")
+            for i in range(3)
+        ],
+        projects_or_certifications=lines[:10],
+    )
+
+
+def _job_description() -> JobDescriptionDetails:
+    return JobDescriptionDetails(
+        job_title="Senior Backend Engineer",
+        key_responsibilities=resume_lines(20),
+        must_have_skills=["Python", "PostgreSQL", "Kubernetes"],
+        preferred_skills=["Airflow"],
+        required_experience_years="5+ years",
+        educational_requirements=None,
+        company_culture_values=None,
+    )
+
+
+def check_context() -> list:
+    """Returns a description of every budget the context builder overruns or loses entries at."""
+    failures = []
+    resume = _resume()
+    parts = [compact_data(resume), compact_data(_job_description())]
+    context = fit_context(parts, max(BUDGETS))
+    marker_tokens = count_tokens(None, TRUNCATION_MARKER.strip())
+    for budget in SMALL_BUDGETS:
+        tokens = count_tokens(None, truncate_to_budget(context, budget))
+        if tokens > max(budget, marker_tokens):
+            failures.append(f"truncate_to_budget at {budget} tokens returned {tokens}")
+
+    # The smallest budget the list caps alone can meet; every entry must survive it
+    budget = count_tokens(None, fit_context([_cap_lists(part, _LIST_CAPS[-1]) for part in parts], 10 ** 6))
+    fitted = fit_context(parts, budget)
+    entries = [e.company for e in resume.work_experiences] + [e.degree for e in resume.education_details]
+    missing = [name for name in entries if f'"{name}"' not in fitted]
+    if missing:
+        failures.append(f"fit_context at {budget} tokens dropped {', '.join(missing)}")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check and benchmark context fitting.")
+    parser.add_argument("--iterations", type=int, default=20, help="Fits per budget.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail if latency regressed against this earlier --json output.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown against the baseline (fraction).")
+    args = parser.parse_args(argv)
+
+    failures = check_context()
+    if failures:
+        print("Context checks failed:", file=sys.stderr)
+        for line in failures:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    print(f"Context checks passed ({len(SMALL_BUDGETS)} small budgets, no entries dropped).")
+
+    parts = [compact_data(_resume()), compact_data(_job_description())]
+    samples = {f"budget_{budget}": [] for budget in BUDGETS + SMALL_BUDGETS[-1:]}
+    for _ in range(args.iterations):
+        for budget in BUDGETS + SMALL_BUDGETS[-1:]:
+            start = time.perf_counter()
+            fit_context(parts, budget)
+            samples[f"budget_{budget}"].append(time.perf_counter() - start)
+
+    results = {"config": vars(args), "latency": {name: summarize(values) for name, values in samples.items()}}
+    print_table("fit_context", results["latency"], unit="ms", scale=1000)
+    return finish(results, args.json, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import argparse
+import io
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+import docx  # python-docx
+from docx.table import Table
+from benchmarks.documents import make_docx
+from benchmarks.report import finish, print_table, summarize
+from document_parsing import extract_docx_text
+
+# Checks that the streaming DOCX extractor returns the same text as python-docx, then compares
+# the two on time and peak memory. The python-docx reference walks the full object model and
+# formats its output the way extract_docx_text does (headers, body blocks in order, table rows
+# as ` | `-separated cells, footers), so the outputs must match exactly.
+#
+#   python -m benchmarks.bench_docx --iterations 10 --json docx.json
+
+SIZES = (50, 200, 1000, 4000)
+
+
+def python_docx_text(data: bytes) -> str:
+    document = docx.Document(io.BytesIO(data))
+    lines: List[str] = []
+    seen = set()
+
+    def add_part(paragraphs) -> None:
+        part = [p.text for p in paragraphs]
+        key = "\n".join(part)
+        if key.strip() and key not in seen:
+            seen.add(key)
+            lines.extend(part)
+
+    for section in document.sections:
+        add_part(section.header.paragraphs)
+    for block in document.iter_inner_content():
+        if isinstance(block, Table):
+            for row in block.rows:
+                # tc_lst rather than row.cells, which repeats merged cells
+                cells = [" ".join(p.text for p in docx.table._Cell(tc, block).paragraphs if p.text) for tc in row._tr.tc_lst]
+                lines.append(" | ".join(cells))
+        else:
+            lines.append(block.text)
+    for section in document.sections:
+        add_part(section.footer.paragraphs)
+    return "".join(line + "\n" for line in lines)
+
+
+def corpus() -> dict:
+    return {
+        f"docx_{n}_paragraphs": make_docx(n, table_rows=n // 20, header_text="Jane Doe | jane@example.com", footer_text="References on request")
+        for n in SIZES
+    }
+
+
+def check_equivalence(documents: dict) -> List[str]:
+    failures = [name for name, data in documents.items() if extract_docx_text(data) != python_docx_text(data)]
+    # python-docx does not read text boxes, so check those separately
+    with_text_box = make_docx(5, table_rows=2, text_box="Contact: jane@example.com")
+    if extract_docx_text(with_text_box).count("Contact: jane@example.com") != 1:
+        failures.append("text box")
+    return failures
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def _peak_rss_mb(extractor: Callable[[bytes], str], data: bytes) -> Optional[float]:
+    # Runs in a fresh process. The peak RSS (reset first, Linux only) is used rather than
+    # tracemalloc, which cannot see lxml's C allocations
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        before = _status_kb("VmRSS")
+    except OSError:
+        return None
+    extractor(data)
+    return (_status_kb("VmHWM") - before) / 1024
+
+
+def peak_rss_mb(extractor: Callable[[bytes], str], data: bytes) -> Optional[float]:
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_peak_rss_mb, extractor, data).result()
+
+
+def timings(extractor: Callable[[bytes], str], data: bytes, iterations: int) -> list:
+    extractor(data)  # Warm-up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        extractor(data)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the streaming DOCX extractor with python-docx.")
+    parser.add_argument("--iterations", type=int, default=10, help="Parses per document and extractor.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail if latency regressed against this earlier --json output.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown against the baseline (fraction).")
+    args = parser.parse_args(argv)
+
+    documents = corpus()
+    failures = check_equivalence(documents)
+    if failures:
+        print(f"Output differs from python-docx for: {', '.join(failures)}", file=sys.stderr)
+        return 1
+    print("Streaming extractor output matches python-docx.")
+
+    results = {"config": vars(args), "streaming": {}, "python_docx": {}, "peak_rss_mb": {}}
+    for name, data in documents.items():
+        results["streaming"][name] = summarize(timings(extract_docx_text, data, args.iterations))
+        results["python_docx"][name] = summarize(timings(python_docx_text, data, args.iterations))
+        results["peak_rss_mb"][name] = {
+            "streaming": peak_rss_mb(extract_docx_text, data),
+            "python_docx": peak_rss_mb(python_docx_text, data),
+        }
+
+    print_table("Streaming extractor", results["streaming"], unit="ms", scale=1000)
+    print_table("python-docx", results["python_docx"], unit="ms", scale=1000)
+    print("\nPeak memory growth (MB):")
+    print(f"  {'':40} {'streaming':>10} {'python-docx':>12}")
+    for name, peaks in results["peak_rss_mb"].items():
+        if None in peaks.values():
+            print("  (not available on this platform)")
+            break
+        print(f"  {name:40} {peaks['streaming']:>10.1f} {peaks['python_docx']:>12.1f}")
+    return finish(results, args.json, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
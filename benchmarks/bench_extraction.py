@@ -0,0 +1,63 @@
+import os
+
+# No network: use litellm's bundled price table and keep crewai telemetry off
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import argparse
+import sys
+import time
+from benchmarks.bench_pipeline import JOB_DESCRIPTION
+from benchmarks.documents import resume_lines
+from benchmarks.fake_llm import MODEL, install_fake_llm
+from benchmarks.report import finish, print_table, summarize
+from crew_scheduler import run_task_graph
+from pipeline import build_agents, build_tasks, structured_executor
+
+# Model calls and latency of the two analysis tasks, extracted through crewai's output_pydantic
+# flow versus the single-call structured extraction, against a fake LLM that returns a share of
+# malformed structured replies.
+#
+#   python -m benchmarks.bench_extraction --runs 20 --malformed-rate 0.3
+
+
+def run_analyses(mode: str):
+    """Returns the seconds taken and the calls saved that the extractions estimated."""
+    tasks = build_tasks(build_agents(MODEL, verbose=False), "\n".join(resume_lines(60)), JOB_DESCRIPTION)
+    start = time.perf_counter()
+    run_task_graph([tasks.analyze_resume, tasks.analyze_job_description], execute=structured_executor(tasks, mode))
+    return time.perf_counter() - start, sum(result.estimated_calls_saved for result in tasks.extractions.values())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare crewai's structured output flow with the single-call extraction.")
+    parser.add_argument("--runs", type=int, default=10, help="Resume + job description analyses per mode.")
+    parser.add_argument("--malformed-rate", type=float, default=0.3, help="Share of structured replies that need repair.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM seconds per call.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail if latency regressed against this earlier --json output.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown against the baseline (fraction).")
+    args = parser.parse_args(argv)
+
+    results = {"config": vars(args), "latency": {}, "calls_per_extraction": {}}
+    for mode in ("crewai", "native"):
+        # Same seed for both modes, so they see the same sequence of malformed replies
+        fake = install_fake_llm(latency=args.latency, malformed_rate=args.malformed_rate)
+        samples = [run_analyses(mode) for _ in range(args.runs)]
+        results["latency"][mode] = summarize([seconds for seconds, _ in samples])
+        results["calls_per_extraction"][mode] = fake.calls / (2 * args.runs) if args.runs else 0.0
+        if mode == "native":
+            results["estimated_calls_saved_per_extraction"] = sum(saved for _, saved in samples) / (2 * args.runs) if args.runs else 0.0
+
+    crewai_calls, native_calls = results["calls_per_extraction"]["crewai"], results["calls_per_extraction"]["native"]
+    results["calls_saved_per_extraction"] = crewai_calls - native_calls
+    print_table("Resume + job description analysis", results["latency"])
+    print(f"\nCalls per extraction: crewai {crewai_calls:.2f}, native {native_calls:.2f} "
+          f"({results['calls_saved_per_extraction']:.2f} saved at malformed rate {args.malformed_rate:.0%}; "
+          f"the extractions estimated {results['estimated_calls_saved_per_extraction']:.2f})")
+    return finish(results, args.json, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
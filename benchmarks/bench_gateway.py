@@ -0,0 +1,93 @@
+import os
+
+# No network: use litellm's bundled price table and keep crewai telemetry off
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from agent_llm import AgentLLM
+from benchmarks.fake_llm import MODEL, install_fake_llm
+from benchmarks.report import finish, print_table, summarize
+from llm_gateway import LLMGateway, set_gateway
+
+# Concurrent sessions calling a fake model that rejects calls beyond its rate limit with a 429,
+# with a share of identical prompts in flight at the same time. Compares calling the model
+# directly ("off"), the gateway with backoff only ("backoff"), and the gateway with token-bucket
+# limits set just under the provider's ("limited").
+#
+#   python -m benchmarks.bench_gateway --sessions 8 --rounds 5 --duplicate-rate 0.5
+
+
+def run_mode(mode: str, args) -> dict:
+    fake = install_fake_llm(latency=args.latency, throttle_requests=args.provider_limit, throttle_window=args.window)
+    os.environ["LLM_GATEWAY_MODE"] = "off" if mode == "off" else "shared"
+    # 90% of the provider's rate, with a tenth of its window as burst, as the defaults do for a per-minute quota
+    limit = 0.9 * args.provider_limit * 60 / args.window if mode == "limited" else None
+    gateway = LLMGateway(requests_per_minute=limit, burst_seconds=args.window / 10)
+    set_gateway(None if mode == "off" else gateway)
+    llm = AgentLLM(MODEL, role="Benchmark")
+    rng = random.Random(0)
+
+    def request(prompt: str):
+        start = time.perf_counter()
+        try:
+            llm.call([{"role": "user", "content": prompt}])
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    latencies, failures = [], 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        for round_number in range(args.rounds):
+            prompts = [f"Shared prompt {round_number}" if rng.random() < args.duplicate_rate else f"Prompt {round_number}.{i}"
+                       for i in range(args.sessions)]
+            for seconds, error in pool.map(request, prompts):
+                latencies.append(seconds)
+                failures += error is not None
+    return {
+        "latency": summarize(latencies),
+        "wall_seconds": time.perf_counter() - started,
+        "requests": len(latencies),
+        "failed": failures,
+        "provider_calls": fake.calls,
+        "provider_429s": fake.throttled,
+        "coalesced": gateway.coalesced if mode != "off" else 0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the LLM gateway against a rate-limited fake model.")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent callers.")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds of one call per session.")
+    parser.add_argument("--duplicate-rate", type=float, default=0.5, help="Share of calls per round with the same prompt.")
+    parser.add_argument("--provider-limit", type=int, default=10, help="Calls the fake model accepts per window.")
+    parser.add_argument("--window", type=float, default=2.0, help="Fake model rate limit window in seconds.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds per call.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail if latency regressed against this earlier --json output.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown against the baseline (fraction).")
+    args = parser.parse_args(argv)
+
+    results = {"config": vars(args), "modes": {}}
+    for mode in ("off", "backoff", "limited"):
+        results["modes"][mode] = run_mode(mode, args)
+        # Let the fake model's window empty out between modes
+        time.sleep(args.window)
+    set_gateway(None)
+
+    print_table("Call latency", {mode: r["latency"] for mode, r in results["modes"].items()})
+    print(f"\n  {'':10} {'requests':>9} {'failed':>7} {'provider calls':>15} {'429s':>6} {'shared':>7} {'wall':>8}")
+    for mode, r in results["modes"].items():
+        print(f"  {mode:10} {r['requests']:>9} {r['failed']:>7} {r['provider_calls']:>15} {r['provider_429s']:>6} "
+              f"{r['coalesced']:>7} {r['wall_seconds']:>7.2f}s")
+    return finish(results, args.json, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import os
+
+# The corpus goes past the default page budget on purpose
+os.environ.setdefault("RESUME_MAX_PAGES", "200")
+
+import argparse
+import sys
+import tempfile
+import time
+from benchmarks.documents import make_docx, make_pdf
+from benchmarks.report import finish, print_table, summarize
+from document_parsing import parsed_text_cache
+from job_app_tools import ResumeParserTool
+
+# Resume parser throughput over synthetic PDFs and DOCX files of increasing size. The parsed
+# text cache is cleared before every iteration, so this measures extraction, not cache hits.
+#
+#   python -m benchmarks.bench_parser --iterations 20 --json parser.json
+
+PDF_PAGES = (1, 5, 20, 80)
+DOCX_PARAGRAPHS = (50, 200, 1000, 4000)
+
+
+def build_corpus(directory: str) -> dict:
+    corpus = {}
+    for pages in PDF_PAGES:
+        corpus[f"pdf_{pages}_pages"] = ("resume.pdf", make_pdf(pages))
+    for paragraphs in DOCX_PARAGRAPHS:
+        corpus[f"docx_{paragraphs}_paragraphs"] = ("resume.docx", make_docx(paragraphs, table_rows=paragraphs // 20, header_text="Jane Doe"))
+    paths = {}
+    for name, (file_name, data) in corpus.items():
+        path = os.path.join(directory, f"{name}_{file_name}")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths[name] = path
+    return paths
+
+
+def measure(tool: ResumeParserTool, path: str, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        parsed_text_cache.clear()
+        start = time.perf_counter()
+        text = tool._run(path)
+        samples.append(time.perf_counter() - start)
+        if text.startswith("Error"):
+            raise RuntimeError(f"{os.path.basename(path)}: {text}")
+    return samples
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark resume text extraction.")
+    parser.add_argument("--iterations", type=int, default=10, help="Parses per document.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail if latency regressed against this earlier --json output.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown against the baseline (fraction).")
+    args = parser.parse_args(argv)
+
+    tool = ResumeParserTool()
+    results = {"config": vars(args), "documents": {}, "mb_per_second": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, path in build_corpus(directory).items():
+            tool._run(path)  # Warm-up
+            samples = measure(tool, path, args.iterations)
+            stats = summarize(samples)
+            results["documents"][name] = stats
+            results["mb_per_second"][name] = os.path.getsize(path) / 1e6 / stats["p50"] if stats["p50"] else 0.0
+
+    print_table("Resume parser (cache cleared)", results["documents"], unit="ms", scale=1000)
+    print("\nThroughput at p50:")
+    for name, rate in results["mb_per_second"].items():
+        print(f"  {name:40} {rate:>8.2f} MB/s")
+    return finish(results, args.json, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import os
+
+# No network: use litellm's bundled price table and keep crewai telemetry off
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from crewai import Crew, Process
+from benchmarks.documents import resume_lines
+from benchmarks.fake_llm import MODEL, install_fake_llm
+from benchmarks.report import finish, print_table, summarize
+from context_builder import build_task_context
+from crew_scheduler import run_task_graph
+from metrics import track_run
+from pipeline import build_agents, build_refinement_task, build_tasks, match_analysis_gate, structured_executor
+
+# End-to-end benchmark of the six-task pipeline and the section refinement flow against a
+# local fake LLM. Measures what our code adds on top of model latency, so run it before and
+# after a change (with --json / --baseline) to catch regressions.
+#
+#   python -m benchmarks.bench_pipeline --runs 20 --concurrency 4 --latency 0.2 --tokens-per-second 400
+
+JOB_DESCRIPTION = (
+    "Senior Backend Engineer. You will design and build scalable REST APIs, operate services on "
+    "Kubernetes in AWS and mentor engineers. Must have Python, Kubernetes, PostgreSQL and AWS. "
+    "Go and Terraform are a plus. 5+ years of experience."
+)
+
+
+def run_pipeline(mode: str, match_analysis: str, extraction: str = "native") -> dict:
+    agents = build_agents(MODEL, verbose=False)
+    tasks = build_tasks(agents, "\n".join(resume_lines(60)), JOB_DESCRIPTION)
+    start = time.perf_counter()
+    with track_run("bench_pipeline") as run_metrics:
+        if mode == "sequential":
+            Crew(agents=[task.agent for task in tasks.all()], tasks=tasks.all(), process=Process.sequential, verbose=False).kickoff()
+        else:
+            run_task_graph(tasks.all(), should_run=match_analysis_gate(tasks, match_analysis),
+                           build_context=build_task_context, execute=structured_executor(tasks, extraction))
+    return {
+        "seconds": time.perf_counter() - start,
+        "stages": {name: stage.wall_seconds or stage.llm_seconds for name, stage in run_metrics.stages.items()},
+        "llm_calls": sum(stage.llm_calls for stage in run_metrics.stages.values()),
+        "prompt_tokens": sum(stage.prompt_tokens for stage in run_metrics.stages.values()),
+        "context_tokens_saved": sum(stage.context_tokens_saved for stage in run_metrics.stages.values()),
+    }
+
+
+def run_refinement() -> float:
+    agents = build_agents(MODEL, verbose=False)
+    task = build_refinement_task(agents, "\n".join(resume_lines(6)), "Make it more concise and results-focused")
+    start = time.perf_counter()
+    with track_run("bench_refinement"):
+        Crew(agents=[agents.section_refiner], tasks=[task], verbose=False).kickoff()
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the crew pipeline against a local fake LLM.")
+    parser.add_argument("--runs", type=int, default=10, help="Pipeline runs to measure.")
+    parser.add_argument("--refinements", type=int, default=10, help="Section refinements to measure.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Pipelines run at the same time.")
+    parser.add_argument("--mode", choices=["parallel", "sequential"], default="parallel")
+    parser.add_argument("--match-analysis", choices=["borderline", "local", "llm"], default="borderline")
+    parser.add_argument("--extraction", choices=["native", "crewai"], default="native")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM seconds before the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Fake LLM generation rate (default: instant).")
+    parser.add_argument("--text-tokens", type=int, default=300, help="Length of free-text answers, in tokens.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail if latency regressed against this earlier --json output.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown against the baseline (fraction).")
+    args = parser.parse_args(argv)
+
+    fake = install_fake_llm(latency=args.latency, tokens_per_second=args.tokens_per_second, text_tokens=args.text_tokens)
+    run_pipeline(args.mode, args.match_analysis, args.extraction)  # Warm-up: imports, tokenizers, first-use setup
+    fake.calls = 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        runs = list(pool.map(lambda _: run_pipeline(args.mode, args.match_analysis, args.extraction), range(args.runs)))
+    pipeline_wall = time.perf_counter() - started
+    refinements = [run_refinement() for _ in range(args.refinements)]
+
+    stage_names = sorted({name for run in runs for name in run["stages"]})
+    results = {
+        "config": vars(args),
+        "pipeline": summarize([run["seconds"] for run in runs]),
+        "stages": {name: summarize([run["stages"][name] for run in runs if name in run["stages"]]) for name in stage_names},
+        "refinement": summarize(refinements),
+        "throughput_per_minute": len(runs) / pipeline_wall * 60 if pipeline_wall else 0.0,
+        "llm_calls_per_pipeline": sum(run["llm_calls"] for run in runs) / len(runs) if runs else 0.0,
+        "prompt_tokens_per_pipeline": sum(run["prompt_tokens"] for run in runs) / len(runs) if runs else 0.0,
+        "context_tokens_saved_per_pipeline": sum(run["context_tokens_saved"] for run in runs) / len(runs) if runs else 0.0,
+    }
+
+    print_table("Pipeline", {"end to end": results["pipeline"], **results["stages"]})
+    print_table("Section refinement", {"end to end": results["refinement"]})
+    print(f"\nThroughput: {results['throughput_per_minute']:.1f} pipelines/min at concurrency {args.concurrency}")
+    print(f"LLM calls per pipeline: {results['llm_calls_per_pipeline']:.1f}")
+    print(f"Prompt tokens per pipeline: {results['prompt_tokens_per_pipeline']:.0f} "
+          f"({results['context_tokens_saved_per_pipeline']:.0f} context tokens saved by compaction)")
+    return finish(results, args.json, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import argparse
+import sys
+import time
+from benchmarks.bench_pipeline import JOB_DESCRIPTION
+from benchmarks.documents import resume_lines
+from benchmarks.report import finish, print_table, summarize
+from match_scorer import score_match, score_text_match
+from models import JobDescriptionDetails, ResumeDetails, WorkExperience
+
+# Local match scorer: first checks that skills written differently in the resume's bullets and
+# in the job description still match (aliases), then times structured and raw-text scoring.
+#
+#   python -m benchmarks.bench_scorer --iterations 200
+
+# (phrase in a resume bullet, skill the job description asks for)
+ALIAS_PAIRS = [
+    ("Tuned Postgres queries for the billing service", "PostgreSQL"),
+    ("Deployed services on K8s clusters", "Kubernetes"),
+    ("Trained ML models for fraud detection", "Machine Learning"),
+    ("Built REST APIs in Golang", "Go"),
+    ("Migrated the frontend to ReactJS", "React"),
+]
+
+
+def _resume(bullets) -> ResumeDetails:
+    return ResumeDetails(
+        summary=None,
+        work_experiences=[WorkExperience(role="Engineer", company="Acme", duration=None, responsibilities=list(bullets))],
+        skills=[],
+        education_details=[],
+        projects_or_certifications=None,
+    )
+
+
+def _job_description(skills) -> JobDescriptionDetails:
+    return JobDescriptionDetails(
+        job_title="Engineer",
+        key_responsibilities=["Build and run backend services"],
+        must_have_skills=list(skills),
+        preferred_skills=None,
+        required_experience_years=None,
+        educational_requirements=None,
+        company_culture_values=None,
+    )
+
+
+def check_aliases() -> list:
+    """Returns a description of every alias pair the scorer fails to match."""
+    failures = []
+    for bullet, skill in ALIAS_PAIRS:
+        if score_match(_resume([bullet]), _job_description([skill])).missing_skills:
+            failures.append(f"structured: {bullet!r} does not match {skill!r}")
+        matched = score_text_match(bullet, f"We need {skill} expertise.").matched_skills
+        if not all(word in matched for word in skill.lower().split()):
+            failures.append(f"text: {bullet!r} does not match {skill!r}")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check and benchmark the local match scorer.")
+    parser.add_argument("--iterations", type=int, default=100, help="Scores per mode.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail if latency regressed against this earlier --json output.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown against the baseline (fraction).")
+    args = parser.parse_args(argv)
+
+    failures = check_aliases()
+    if failures:
+        print("Alias checks failed:", file=sys.stderr)
+        for line in failures:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    print(f"Alias checks passed ({len(ALIAS_PAIRS)} pairs).")
+
+    lines = resume_lines(60)
+    resume = _resume(lines)
+    job_description = _job_description(["Python", "PostgreSQL", "Kubernetes", "Machine Learning", "Go", "React"])
+    samples = {"structured": [], "text": []}
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        score_match(resume, job_description)
+        samples["structured"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        score_text_match("\n".join(lines), JOB_DESCRIPTION)
+        samples["text"].append(time.perf_counter() - start)
+
+    results = {"config": vars(args), "latency": {mode: summarize(values) for mode, values in samples.items()}}
+    print_table("Match scoring", results["latency"], unit="ms", scale=1000)
+    return finish(results, args.json, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+from benchmarks.report import finish, print_table, summarize
+
+# Time to interactive of the Streamlit app: the first script run in a fresh process (what a user
+# waits for after the server starts), later reruns in the same process, and how long the first
+# and later runs wait for an agent set. Each sample runs in its own Python process so imports are
+# cold, with the job queue on and no workers, as when the workers run separately.
+#
+#   python -m benchmarks.bench_startup --cold-runs 5 --reruns 20
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP_RUNS = textwrap.dedent("""
+    import json, sys, time
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file({app!r}, default_timeout=120)
+    timings = []
+    for _ in range({runs}):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+    assert not app.exception, app.exception
+    print(json.dumps({{"timings": timings, "crewai_loaded": "crewai" in sys.modules}}))
+""")
+
+AGENT_LEASES = textwrap.dedent("""
+    import json, time
+    from agent_pool import get_agent_pool
+    timings = []
+    for _ in range({runs}):
+        started = time.perf_counter()
+        with get_agent_pool("gemini/benchmark", verbose=False).lease():
+            timings.append(time.perf_counter() - started)
+    print(json.dumps({{"timings": timings}}))
+""")
+
+
+def run_sample(code: str, workdir: str) -> dict:
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "GEMINI_API_KEY": "benchmark",
+        "JOB_EXECUTION_MODE": "queue",
+        "JOB_WORKERS": "0",
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.sqlite"),
+        "AGENT_WARMUP_MODE": "lazy",
+        "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+        "CREWAI_DISABLE_TELEMETRY": "true",
+        "OTEL_SDK_DISABLED": "true",
+    }
+    completed = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the app's cold start and rerun latency.")
+    parser.add_argument("--cold-runs", type=int, default=5, help="Fresh processes to time the first script run in.")
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns to time after the first, in one process.")
+    parser.add_argument("--leases", type=int, default=5, help="Agent set leases per process.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail if latency regressed against this earlier --json output.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed slowdown against the baseline (fraction).")
+    args = parser.parse_args(argv)
+
+    app = os.path.join(ROOT, "app.py")
+    cold, first_lease, later_leases = [], [], []
+    crewai_loaded = False
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(args.cold_runs):
+            sample = run_sample(APP_RUNS.format(app=app, runs=1), workdir)
+            cold.extend(sample["timings"])
+            crewai_loaded |= sample["crewai_loaded"]
+        reruns = run_sample(APP_RUNS.format(app=app, runs=args.reruns + 1), workdir)["timings"][1:]
+        for _ in range(args.cold_runs):
+            leases = run_sample(AGENT_LEASES.format(runs=args.leases), workdir)["timings"]
+            first_lease.append(leases[0])
+            later_leases.extend(leases[1:])
+
+    results = {
+        "config": vars(args),
+        "app": {"first_run": summarize(cold), "rerun": summarize(reruns)},
+        "agents": {"first_lease": summarize(first_lease), "later_lease": summarize(later_leases)},
+        "crewai_loaded_on_first_run": crewai_loaded,
+    }
+    print_table("App script run", results["app"])
+    print_table("Agent set lease", results["agents"], unit="ms", scale=1000)
+    print(f"\n  crewai imported by the first script run: {'yes' if crewai_loaded else 'no'}")
+    return finish(results, args.json, args.baseline, args.max_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import io
+import zipfile
+from typing import List
+
+# Synthetic resumes of a chosen size, written without any PDF/DOCX libraries so the corpus
+# does not depend on the code being measured.
+
+_LINES = [
+    "Senior Software Engineer, Acme Analytics (2021 - Present)",
+    "Designed REST APIs in Python and FastAPI serving 2M requests per day",
+    "Migrated batch jobs to Kubernetes, cutting infrastructure cost by 30 percent",
+    "Built ETL pipelines with Airflow and PostgreSQL for the finance team",
+    "Skills: Python, FastAPI, PostgreSQL, Docker, Kubernetes, Airflow",
+    "Education: B.Sc. Computer Science, State University, 2018",
+]
+
+
+def resume_lines(count: int) -> List[str]:
+    return [f"{_LINES[i % len(_LINES)]} ({i + 1})" for i in range(count)]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 45) -> bytes:
+    """A text PDF with `pages` pages of Helvetica text."""
+    objects: List[bytes] = []
+    page_ids = [4 + 2 * i for i in range(pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    lines = resume_lines(pages * lines_per_page)
+    for page in range(pages):
+        page_lines = lines[page * lines_per_page:(page + 1) * lines_per_page]
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in page_lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {page_ids[page] + 1} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode())
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+_R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_TEXT_BOX_NS = (
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml"'
+)
+
+
+def _xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _paragraph(text: str) -> str:
+    # A tab in `text` is written the way Word aligns a column: a tab stop defined in the paragraph
+    # properties, which is not text, and a w:tab run where the text jumps to it
+    runs = "<w:r><w:tab/></w:r>".join(f"<w:r><w:t xml:space=\"preserve\">{_xml_escape(part)}</w:t></w:r>" for part in text.split("\t"))
+    properties = '<w:pPr><w:tabs><w:tab w:val="right" w:pos="9360"/></w:tabs></w:pPr>' if "\t" in text else ""
+    return f"<w:p>{properties}{runs}</w:p>"
+
+
+def _text_box(text: str) -> str:
+    # Word writes a DrawingML text box plus a VML copy of it for older readers
+    content = f"<w:txbxContent>{_paragraph(text)}</w:txbxContent>"
+    return (
+        "<w:p><w:r><mc:AlternateContent>"
+        f'<mc:Choice Requires="wps"><w:drawing><wps:wsp><wps:txbx>{content}</wps:txbx></wps:wsp></w:drawing></mc:Choice>'
+        f"<mc:Fallback><w:pict><v:shape><v:textbox>{content}</v:textbox></v:shape></w:pict></mc:Fallback>"
+        "</mc:AlternateContent></w:r></w:p>"
+    )
+
+
+def make_docx(paragraphs: int, table_rows: int = 0, header_text: str = "", footer_text: str = "",
+              text_box: str = "") -> bytes:
+    """A DOCX with `paragraphs` body paragraphs, optionally a two-column skills table, a header,
+    a footer and a text box."""
+    body = _text_box(text_box) if text_box else ""
+    # Role lines put their dates at a right-aligned tab stop, as resume templates do
+    body += "".join(_paragraph(line.replace(" (2021", "\t(2021")) for line in resume_lines(paragraphs))
+    if table_rows:
+        rows = "".join(
+            f"<w:tr><w:tc>{_paragraph(f'Skill {i + 1}')}</w:tc><w:tc>{_paragraph(f'Level {i % 5 + 1}')}</w:tc></w:tr>"
+            for i in range(table_rows)
+        )
+        body += f"<w:tbl>{rows}</w:tbl>"
+    section = "<w:sectPr>"
+    if header_text:
+        section += '<w:headerReference w:type="default" r:id="rIdHeader1"/>'
+    if footer_text:
+        section += '<w:footerReference w:type="default" r:id="rIdFooter1"/>'
+    section += "</w:sectPr>"
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f"<w:document {_W} {_R} {_TEXT_BOX_NS}><w:body>{body}{section}</w:body></w:document>"
+    )
+
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        + ('<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>' if header_text else "")
+        + ('<Override PartName="/word/footer1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml"/>' if footer_text else "")
+        + "</Types>"
+    )
+    package_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+        "</Relationships>"
+    )
+    document_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + ('<Relationship Id="rIdHeader1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header1.xml"/>' if header_text else "")
+        + ('<Relationship Id="rIdFooter1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footer" Target="footer1.xml"/>' if footer_text else "")
+        + "</Relationships>"
+    )
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", content_types)
+        z.writestr("_rels/.rels", package_rels)
+        z.writestr("word/_rels/document.xml.rels", document_rels)
+        z.writestr("word/document.xml", document)
+        if header_text:
+            z.writestr("word/header1.xml", f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:hdr {_W}>{_paragraph(header_text)}</w:hdr>')
+        if footer_text:
+            z.writestr("word/footer1.xml", f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:ftr {_W}>{_paragraph(footer_text)}</w:ftr>')
+    return out.getvalue()
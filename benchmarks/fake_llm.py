@@ -0,0 +1,216 @@
+import json
+import random
+import threading
+import time
+from typing import Iterator, List, Optional
+import litellm
+from litellm import CustomLLM
+from litellm.types.utils import GenericStreamingChunk, ModelResponse
+
+# A deterministic stand-in for Gemini, registered with litellm as a custom provider so that
+# agents exercise the same crewai -> AgentLLM -> litellm path as in production. Responses take
+# `latency` seconds before the first token and then arrive at `tokens_per_second`. With
+# `malformed_rate`, that share of structured replies leaves out a required field and ends in a
+# trailing comma, the kind of defect real models produce. With `throttle_requests`, calls beyond
+# that many per `throttle_window` seconds are rejected with a 429, as a provider's rate limit would.
+
+PROVIDER = "fakellm"
+MODEL = f"{PROVIDER}/bench"
+
+SAMPLE_RESUME_DETAILS = {
+    "summary": "Backend engineer with six years of experience building Python services and data pipelines.",
+    "work_experiences": [
+        {
+            "role": "Senior Software Engineer",
+            "company": "Acme Analytics",
+            "duration": "Jan 2021 - Present",
+            "responsibilities": [
+                "Designed REST APIs in Python and FastAPI serving 2M requests per day",
+                "Migrated batch jobs to Kubernetes, cutting infrastructure cost by 30%",
+                "Mentored four engineers and led code reviews",
+            ],
+        },
+        {
+            "role": "Software Engineer",
+            "company": "Northwind Data",
+            "duration": "Jun 2018 - Dec 2020",
+            "responsibilities": [
+                "Built ETL pipelines with Airflow and PostgreSQL",
+                "Added CI/CD with GitHub Actions and Docker",
+            ],
+        },
+    ],
+    "skills": ["Python", "FastAPI", "PostgreSQL", "Docker", "Kubernetes", "Airflow", "Communication"],
+    "education_details": [
+        {"degree": "B.Sc. Computer Science", "institution": "State University", "graduation_date": "2018"},
+    ],
+    "projects_or_certifications": ["AWS Certified Developer"],
+}
+
+SAMPLE_JOB_DESCRIPTION_DETAILS = {
+    "job_title": "Senior Backend Engineer",
+    "key_responsibilities": [
+        "Design and build scalable REST APIs",
+        "Operate services on Kubernetes in AWS",
+        "Mentor engineers and review code",
+    ],
+    "must_have_skills": ["Python", "Kubernetes", "PostgreSQL", "AWS"],
+    "preferred_skills": ["Go", "Terraform"],
+    "required_experience_years": "5+ years",
+    "educational_requirements": ["Bachelor's degree in Computer Science or related field"],
+    "company_culture_values": ["Ownership", "Remote-first"],
+}
+
+_FILLER = (
+    "Tailored content that highlights measurable impact, relevant keywords and the experience the role "
+    "asks for, written in a professional tone. "
+)
+
+
+class FakeLLM(CustomLLM):
+    def __init__(self, latency: float = 0.0, tokens_per_second: Optional[float] = None, text_tokens: int = 300,
+                 malformed_rate: float = 0.0, seed: int = 0, throttle_requests: Optional[int] = None,
+                 throttle_window: float = 60.0):
+        super().__init__()
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.text_tokens = text_tokens
+        self.malformed_rate = malformed_rate
+        self.throttle_requests = throttle_requests
+        self.throttle_window = throttle_window
+        self.calls = 0
+        self.throttled = 0
+        self._accepted: List[float] = []
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    # --- Response content ---
+
+    def _structured_payload(self, messages: List[dict]) -> Optional[dict]:
+        prompt = json.dumps(messages)
+        if "You are Resume Analyzer" in prompt:
+            return SAMPLE_RESUME_DETAILS
+        if "You are Job Description Deconstructor" in prompt:
+            return SAMPLE_JOB_DESCRIPTION_DETAILS
+        return None
+
+    def _structured_json(self, payload: dict) -> str:
+        with self._lock:
+            malformed = self._random.random() < self.malformed_rate
+        if not malformed:
+            return json.dumps(payload)
+        # Drops the first field (optional in the schema, but the key is required) and leaves a trailing comma
+        payload = dict(list(payload.items())[1:])
+        return json.dumps(payload)[:-1] + ",}"
+
+    def _answer(self, messages: List[dict]) -> str:
+        payload = self._structured_payload(messages)
+        if payload is not None:
+            body = self._structured_json(payload)
+        else:
+            words = (_FILLER * (self.text_tokens // 20 + 1)).split()
+            body = " ".join(words[: self.text_tokens])
+        return f"Thought: I now can give a great answer\nFinal Answer: {body}"
+
+    def _tokens(self, text: str) -> List[str]:
+        # Roughly one token per word, keeping the whitespace so the stream reassembles exactly
+        return [word + " " for word in text.split(" ")[:-1]] + [text.split(" ")[-1]]
+
+    def _wait(self, token_count: int) -> None:
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += token_count / self.tokens_per_second
+        if delay > 0:
+            time.sleep(delay)
+
+    def _count_call(self, model: str) -> None:
+        with self._lock:
+            self.calls += 1
+            if self.throttle_requests is None:
+                return
+            now = time.monotonic()
+            self._accepted = [t for t in self._accepted if now - t < self.throttle_window]
+            if len(self._accepted) >= self.throttle_requests:
+                self.throttled += 1
+                raise litellm.RateLimitError(message="429 Resource has been exhausted (fake rate limit).",
+                                             llm_provider=PROVIDER, model=model)
+            self._accepted.append(now)
+
+    # --- litellm CustomLLM interface ---
+
+    def completion(self, model: str, messages: list, *args, optional_params: Optional[dict] = None, **kwargs) -> ModelResponse:
+        self._count_call(model)
+        tools = (optional_params or {}).get("tools") or kwargs.get("tools")
+        response_format = (optional_params or {}).get("response_format") or kwargs.get("response_format")
+        payload = self._structured_payload(messages)
+        if response_format and payload is not None:
+            # Native structured output: the reply is the JSON document itself
+            text = self._structured_json(payload)
+            self._wait(len(text.split()))
+            message = {"role": "assistant", "content": text}
+            finish_reason = "stop"
+            completion_tokens = len(text.split())
+        elif tools and payload is not None:
+            # Structured output requested through function calling (crewai's instructor path)
+            arguments = self._structured_json(payload)
+            self._wait(len(arguments.split()))
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{self.calls}",
+                    "type": "function",
+                    "function": {"name": tools[0]["function"]["name"], "arguments": arguments},
+                }],
+            }
+            finish_reason = "tool_calls"
+            completion_tokens = len(arguments.split())
+        else:
+            text = self._answer(messages)
+            self._wait(len(self._tokens(text)))
+            message = {"role": "assistant", "content": text}
+            finish_reason = "stop"
+            completion_tokens = len(self._tokens(text))
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+        return ModelResponse(
+            model=model,
+            choices=[{"index": 0, "message": message, "finish_reason": finish_reason}],
+            usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                   "total_tokens": prompt_tokens + completion_tokens},
+        )
+
+    def streaming(self, model: str, messages: list, *args, **kwargs) -> Iterator[GenericStreamingChunk]:
+        self._count_call(model)
+        tokens = self._tokens(self._answer(messages))
+        if self.latency > 0:
+            time.sleep(self.latency)
+        for i, token in enumerate(tokens):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            last = i == len(tokens) - 1
+            yield {
+                "text": token,
+                "tool_use": None,
+                "is_finished": last,
+                "finish_reason": "stop" if last else "",
+                "usage": None,
+                "index": 0,
+            }
+
+
+def install_fake_llm(latency: float = 0.0, tokens_per_second: Optional[float] = None, text_tokens: int = 300,
+                     malformed_rate: float = 0.0, seed: int = 0, throttle_requests: Optional[int] = None,
+                     throttle_window: float = 60.0) -> FakeLLM:
+    """Registers a FakeLLM with litellm and returns it; agents should use the `MODEL` identifier."""
+    fake = FakeLLM(latency=latency, tokens_per_second=tokens_per_second, text_tokens=text_tokens,
+                   malformed_rate=malformed_rate, seed=seed, throttle_requests=throttle_requests,
+                   throttle_window=throttle_window)
+    # Advertise native structured output, as Gemini does
+    litellm.register_model({MODEL: {"litellm_provider": PROVIDER, "mode": "chat", "supports_response_schema": True}})
+    litellm.custom_provider_map = [
+        entry for entry in litellm.custom_provider_map if entry["provider"] != PROVIDER
+    ] + [{"provider": PROVIDER, "custom_handler": fake}]
+    # litellm only reads the map when it is (re)registered
+    from litellm.utils import custom_llm_setup
+    custom_llm_setup()
+    return fake
@@ -0,0 +1,68 @@
+import json
+import sys
+from typing import Dict, List, Optional, Sequence
+from metrics import quantile
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": quantile(values, 0.5),
+        "p95": quantile(values, 0.95),
+        "max": max(values),
+    }
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]], unit: str = "s", scale: float = 1.0) -> None:
+    print(f"\n{title}")
+    print(f"  {'':40} {'n':>5} {'mean':>10} {'p50':>10} {'p95':>10} {'max':>10}")
+    for name, stats in rows.items():
+        if not stats.get("count"):
+            continue
+        cells = " ".join(f"{stats[k] * scale:>9.3f}{unit}" for k in ("mean", "p50", "p95", "max"))
+        print(f"  {name:40} {stats['count']:>5} {cells}")
+
+
+def _flatten(results: dict, prefix: str = "") -> Dict[str, dict]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict) and "p50" in value:
+            flat[prefix + key] = value
+        elif isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+    return flat
+
+
+def check_regressions(results: dict, baseline_path: str, max_regression: float) -> List[str]:
+    """Names every latency summary whose p50 or p95 grew more than `max_regression` (a fraction)
+    over the same summary in a previous `--json` output."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = _flatten(json.load(f))
+    regressions = []
+    for name, stats in _flatten(results).items():
+        if name not in baseline:
+            continue
+        for q in ("p50", "p95"):
+            before, after = baseline[name].get(q), stats.get(q)
+            if before and after and after > before * (1 + max_regression):
+                regressions.append(f"{name} {q}: {before:.4f} -> {after:.4f} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def finish(results: dict, json_path: Optional[str], baseline_path: Optional[str], max_regression: float) -> int:
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if not baseline_path:
+        return 0
+    regressions = check_regressions(results, baseline_path, max_regression)
+    if regressions:
+        print("\nRegressions against baseline:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    print(f"\nNo regressions beyond {max_regression:.0%} against {baseline_path}.")
+    return 0
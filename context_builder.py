@@ -0,0 +1,171 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pydantic import BaseModel
+from crew_scheduler import CONTEXT_DIVIDER, dependencies, raw_context, stage_name
+from metrics import record_context_tokens
+
+# Smaller prompts for the downstream tasks. Instead of the raw outputs crewai would pass as
+# context, each task gets the structured analyses as minimal JSON (no empty fields, no
+# whitespace), restricted to the fields that task uses, and the whole context is trimmed to a
+# per-task token budget. Tokens sent and saved are recorded on the current run.
+
+# Fields each task reads from the structured analyses, by agent role. Tasks not listed get
+# every field.
+TASK_CONTEXT_FIELDS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "Initial Resume-JD Match Analyzer": {
+        "ResumeDetails": ("summary", "work_experiences", "skills", "education_details"),
+        "JobDescriptionDetails": ("job_title", "key_responsibilities", "must_have_skills", "preferred_skills",
+                                  "required_experience_years", "educational_requirements"),
+    },
+    "Strategic Resume Tailoring Advisor": {
+        "JobDescriptionDetails": ("job_title", "key_responsibilities", "must_have_skills", "preferred_skills",
+                                  "required_experience_years"),
+    },
+    "Expert Resume Editor": {
+        "JobDescriptionDetails": ("job_title", "key_responsibilities", "must_have_skills", "preferred_skills"),
+    },
+    "Persuasive Cover Letter Drafter": {
+        "ResumeDetails": ("summary", "work_experiences", "skills", "projects_or_certifications"),
+        "JobDescriptionDetails": ("job_title", "key_responsibilities", "must_have_skills", "company_culture_values"),
+    },
+}
+
+# Context tokens allowed per task, by agent role; CONTEXT_TOKEN_BUDGET overrides them all
+TASK_TOKEN_BUDGETS: Dict[str, int] = {
+    "Initial Resume-JD Match Analyzer": 2000,
+    "Strategic Resume Tailoring Advisor": 3000,
+    "Expert Resume Editor": 4000,
+    "Persuasive Cover Letter Drafter": 3000,
+}
+DEFAULT_TOKEN_BUDGET = 4000
+RESUME_TEXT_TOKEN_BUDGET = int(os.getenv("RESUME_TEXT_TOKEN_BUDGET", "8000"))
+# Lengths tried, in order, for the free-text lists (bullets, skills) in structured context that is
+# over budget. Lists of entries (work experiences, education) are never shortened.
+_LIST_CAPS = (12, 8, 5, 3, 1)
+TRUNCATION_MARKER = "\n[...truncated to fit the context budget]"
+
+
+def count_tokens(model: Optional[str], text: str) -> int:
+    import litellm
+
+    try:
+        return litellm.token_counter(model=model or "", text=text)
+    except Exception:
+        return len(text) // 4
+
+
+def _prune(value: Any) -> Any:
+    if isinstance(value, dict):
+        pruned = {k: _prune(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [v for v in (_prune(v) for v in value) if v not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _cap_lists(value: Any, cap: int) -> Any:
+    if isinstance(value, dict):
+        return {k: _cap_lists(v, cap) for k, v in value.items()}
+    if isinstance(value, list):
+        if any(isinstance(v, (dict, list)) for v in value):
+            return [_cap_lists(v, cap) for v in value]
+        return value[:cap]
+    return value
+
+
+def compact_data(model: BaseModel, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    data = model.model_dump(include=set(fields) if fields else None)
+    return _prune(data)
+
+
+def compact_json(model: BaseModel, fields: Optional[Sequence[str]] = None) -> str:
+    """`model` as minimal JSON: only `fields` (all by default), no empty values, no whitespace."""
+    return json.dumps(compact_data(model, fields), separators=(",", ":"), ensure_ascii=False)
+
+
+def compact_text(text: str) -> str:
+    """Collapses the runs of spaces and blank lines that PDF/DOCX extraction leaves behind."""
+    text = re.sub(r"[ \t\u00a0]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def truncate_to_budget(text: str, budget: int, model: Optional[str] = None) -> str:
+    """`text` cut to `budget` tokens, marker included. A budget too small for any text gives the
+    bare marker."""
+    tokens = count_tokens(model, text)
+    if tokens <= budget:
+        return text
+    text_budget = budget - count_tokens(model, TRUNCATION_MARKER)
+    keep = len(text)
+    while text_budget > 0:
+        # Scale by the measured ratio with a little headroom, and always cut more than last time
+        keep = min(int(keep * text_budget / tokens * 0.95), keep - 1)
+        if keep <= 0:
+            break
+        kept = text[:keep].rstrip()
+        truncated = kept + TRUNCATION_MARKER
+        if count_tokens(model, truncated) <= budget:
+            return truncated
+        tokens = max(1, count_tokens(model, kept))
+    return TRUNCATION_MARKER.strip()
+
+
+def resume_prompt_text(resume_text: str, role: str, model: Optional[str] = None) -> str:
+    """The resume text as embedded in the analysis prompt: whitespace compacted and trimmed to
+    RESUME_TEXT_TOKEN_BUDGET."""
+    text = truncate_to_budget(compact_text(resume_text), RESUME_TEXT_TOKEN_BUDGET, model)
+    record_context_tokens(role, count_tokens(model, text), count_tokens(model, resume_text))
+    return text
+
+
+def token_budget(role: str) -> int:
+    override = os.getenv("CONTEXT_TOKEN_BUDGET")
+    if override:
+        return int(override)
+    return TASK_TOKEN_BUDGETS.get(role, DEFAULT_TOKEN_BUDGET)
+
+
+def _render(parts: List[Any]) -> str:
+    return CONTEXT_DIVIDER.join(
+        part if isinstance(part, str) else json.dumps(part, separators=(",", ":"), ensure_ascii=False)
+        for part in parts
+    )
+
+
+def fit_context(parts: List[Any], budget: int, model: Optional[str] = None) -> str:
+    """Joins context parts (strings, or dicts rendered as JSON) within `budget` tokens: first by
+    shortening the free-text lists in the structured parts, then by truncating the joined text."""
+    context = _render(parts)
+    if count_tokens(model, context) <= budget:
+        return context
+    for cap in _LIST_CAPS:
+        context = _render([part if isinstance(part, str) else _cap_lists(part, cap) for part in parts])
+        if count_tokens(model, context) <= budget:
+            return context
+    return truncate_to_budget(context, budget, model)
+
+
+def build_task_context(task) -> str:
+    """Context for `task` from its dependencies' outputs; a drop-in for the scheduler's default.
+    Structured outputs are sent as compact JSON with only the fields the task uses."""
+    role = stage_name(task)
+    fields_by_model = TASK_CONTEXT_FIELDS.get(role, {})
+    parts: List[Any] = []
+    for dep in dependencies(task):
+        if dep.output is None:
+            continue
+        if dep.output.pydantic is not None:
+            model = dep.output.pydantic
+            parts.append(compact_data(model, fields_by_model.get(type(model).__name__)))
+        else:
+            parts.append(dep.output.raw.strip())
+    model_name = getattr(getattr(task.agent, "llm", None), "model", None)
+    context = fit_context(parts, token_budget(role), model_name)
+    original_tokens = count_tokens(model_name, raw_context(task))
+    record_context_tokens(role, count_tokens(model_name, context), original_tokens)
+    return context
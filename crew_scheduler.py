@@ -0,0 +1,175 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+from metrics import record_stage_time
+
+# Same divider crewai uses when it joins context outputs for a sequential crew,
+# so prompts look identical whichever execution mode is used.
+CONTEXT_DIVIDER = "\n\n----------\n\n"
+
+
+@dataclass
+class StageTiming:
+    name: str
+    start: float  # Seconds since the start of the run
+    end: float
+    depends_on: List[str] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class ScheduleResult:
+    timings: List[StageTiming]
+    wall_time: float
+
+    def critical_path(self) -> List[StageTiming]:
+        """Walks back from the last stage to finish through the dependency that finished last."""
+        if not self.timings:
+            return []
+        by_name = {t.name: t for t in self.timings}
+        current = max(self.timings, key=lambda t: t.end)
+        path = [current]
+        while True:
+            # Timings built by hand may name stages that never ran
+            ran = [by_name[d] for d in current.depends_on if d in by_name]
+            if not ran:
+                break
+            current = max(ran, key=lambda t: t.end)
+            path.append(current)
+        return list(reversed(path))
+
+    def format_report(self) -> str:
+        lines = [f"Total wall time: {self.wall_time:.2f}s"]
+        for t in sorted(self.timings, key=lambda t: t.start):
+            lines.append(f"- {t.name}: {t.duration:.2f}s (started at +{t.start:.2f}s)")
+        critical = self.critical_path()
+        if critical:
+            lines.append("Critical path: " + " → ".join(t.name for t in critical)
+                         + f" ({sum(t.duration for t in critical):.2f}s)")
+        return "\n".join(lines)
+
+
+def stage_name(task) -> str:
+    return getattr(task, "name", None) or task.agent.role
+
+
+def dependencies(task) -> list:
+    # crewai uses a sentinel rather than None when no context was given
+    return task.context if isinstance(task.context, list) else []
+
+
+def build_task_graph(tasks: Sequence) -> Dict[int, List[int]]:
+    """Maps each task index to the indices of the tasks it depends on (from its `context=` list).
+
+    Context tasks that are not part of `tasks` must already carry an output; they are
+    treated as satisfied dependencies.
+    """
+    index_of = {id(task): i for i, task in enumerate(tasks)}
+    graph: Dict[int, List[int]] = {}
+    for i, task in enumerate(tasks):
+        deps = []
+        for dep in dependencies(task):
+            if id(dep) in index_of:
+                deps.append(index_of[id(dep)])
+            elif dep.output is None:
+                raise ValueError(f"Task '{stage_name(task)}' depends on '{stage_name(dep)}', which is not scheduled and has no output.")
+        graph[i] = deps
+
+    # Reject cycles up front instead of deadlocking the scheduler
+    visiting, done = set(), set()
+
+    def visit(node):
+        if node in done:
+            return
+        if node in visiting:
+            raise ValueError(f"Task dependency cycle detected at '{stage_name(tasks[node])}'.")
+        visiting.add(node)
+        for dep in graph[node]:
+            visit(dep)
+        visiting.discard(node)
+        done.add(node)
+
+    for node in graph:
+        visit(node)
+    return graph
+
+
+def raw_context(task) -> str:
+    """The context crewai itself would pass: the raw outputs of the task's dependencies."""
+    return CONTEXT_DIVIDER.join(dep.output.raw for dep in dependencies(task) if dep.output is not None)
+
+
+def execute_task(task, context: str) -> None:
+    task.execute_sync(agent=task.agent, context=context)
+
+
+def run_task_graph(tasks: Sequence, max_workers: Optional[int] = None,
+                   should_run: Optional[Callable[[object], bool]] = None,
+                   build_context: Callable[[object], str] = raw_context,
+                   execute: Callable[[object, str], None] = execute_task) -> ScheduleResult:
+    """Runs every task as soon as all tasks in its `context=` list have finished.
+
+    Independent tasks run at the same time on a thread pool. Each task's output is left
+    on `task.output`, exactly as `Crew.kickoff()` would leave it. Workers run in a copy of
+    the caller's context, so context variables such as the token sink reach them.
+
+    `should_run`, if given, is asked about each task once its dependencies are done; a task
+    it rejects is skipped (its output stays None) and counts as finished for its dependents.
+    `build_context` turns a task's finished dependencies into its context string, and
+    `execute` runs a task with that context, leaving the result on `task.output`.
+    """
+    graph = build_task_graph(tasks)
+    remaining = {i: set(deps) for i, deps in graph.items()}
+    timings: Dict[int, StageTiming] = {}
+    skipped_tasks = set()
+    run_start = time.perf_counter()
+
+    def run_task(i):
+        task = tasks[i]
+        start = time.perf_counter() - run_start
+        execute(task, build_context(task))
+        end = time.perf_counter() - run_start
+        # Skipped dependencies are decided before a task starts and did not hold it up
+        timings[i] = StageTiming(stage_name(task), start, end, [stage_name(tasks[d]) for d in graph[i] if d not in skipped_tasks])
+        record_stage_time(stage_name(task), end - start)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1) as pool:
+        running = {}
+
+        def submit_ready():
+            skipped = True
+            while skipped:
+                skipped = False
+                for i in [i for i, deps in remaining.items() if not deps]:
+                    del remaining[i]
+                    if should_run is not None and not should_run(tasks[i]):
+                        skipped_tasks.add(i)
+                        for deps in remaining.values():
+                            deps.discard(i)
+                        skipped = True
+                        continue
+                    running[pool.submit(contextvars.copy_context().run, run_task, i)] = i
+
+        submit_ready()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for pending in running:
+                        pending.cancel()
+                    raise error
+                for deps in remaining.values():
+                    deps.discard(i)
+            submit_ready()
+
+    return ScheduleResult(
+        timings=[timings[i] for i in sorted(timings)],
+        wall_time=time.perf_counter() - run_start,
+    )
@@ -0,0 +1,381 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import signal
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, BinaryIO, Iterator, List, Optional, Union
+from xml.etree import ElementTree
+from metrics import timed_stage
+
+if TYPE_CHECKING:
+    import pypdf
+
+# Bounded-cost text extraction for uploaded resumes. Every document is checked against a byte
+# budget and a page budget before any text is extracted, and extraction has a deadline, so one
+# oversized or hostile upload cannot tie up a Streamlit worker. PDF text is extracted in a shared
+# process pool, long PDFs in chunks of pages on several workers; each chunk stops itself at the
+# deadline with SIGALRM, so a hostile page frees its worker instead of holding it. A small PDF
+# parsed on the main thread (the CLIs) is extracted in-process under the same alarm, since the
+# round trip to the pool costs more than the extraction. DOCX files are read straight from the zip
+# with an incremental XML parser instead of building python-docx's full object model. pypdf is
+# imported on the first PDF, so importing this module stays cheap for the app's first page load.
+
+MAX_DOCUMENT_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv("RESUME_MAX_PAGES", "50"))
+PARSE_TIMEOUT_SECONDS = float(os.getenv("RESUME_PARSE_TIMEOUT_SECONDS", "30"))
+# At least two, so one hostile upload running to its deadline does not hold up every other session
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(min(4, max(2, os.cpu_count() or 1)))))
+PAGES_PER_CHUNK = 8
+# Below this many pages a PDF is extracted as one chunk
+PARALLEL_MIN_PAGES = 2 * PAGES_PER_CHUNK
+# Up to this size a PDF is extracted in-process when the deadline can be enforced there
+INLINE_MAX_PAGES = 4
+INLINE_MAX_BYTES = 1024 * 1024
+
+
+class DocumentParseError(Exception):
+    """A document was rejected or could not be extracted in time; the message is user-facing."""
+
+
+class DocumentTooLargeError(DocumentParseError):
+    pass
+
+
+class ParseTimeoutError(DocumentParseError):
+    pass
+
+
+def check_size(data: bytes, max_bytes: Optional[int] = None) -> None:
+    max_bytes = MAX_DOCUMENT_BYTES if max_bytes is None else max_bytes
+    if len(data) > max_bytes:
+        raise DocumentTooLargeError(
+            f"The file is {len(data) / 2**20:.1f} MB; resumes larger than {max_bytes / 2**20:.1f} MB are not accepted."
+        )
+
+
+def _open_pdf(data: bytes, max_pages: Optional[int]) -> "pypdf.PdfReader":
+    import pypdf
+
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    max_pages = MAX_PDF_PAGES if max_pages is None else max_pages
+    if len(reader.pages) > max_pages:
+        raise DocumentTooLargeError(
+            f"The PDF has {len(reader.pages)} pages; resumes longer than {max_pages} pages are not accepted."
+        )
+    return reader
+
+
+def _raise_timeout(signum, frame) -> None:
+    raise ParseTimeoutError("Extracting text from the PDF took too long.")
+
+
+def _can_alarm() -> bool:
+    # Signal handlers can only be installed from the main thread
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def _alarm(seconds: float) -> Iterator[None]:
+    """Raises ParseTimeoutError in the block after `seconds`, even in the middle of a page (pypdf
+    is pure Python). Main thread only; without setitimer the block runs unbounded."""
+    if seconds <= 0:
+        raise ParseTimeoutError("Extracting text from the PDF took too long.")
+    if not hasattr(signal, "setitimer"):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _extract_page_range(data: bytes, start: int, stop: int, seconds: float) -> List[str]:
+    # Runs in a pool worker, so it re-opens the document from bytes
+    import pypdf
+
+    with _alarm(seconds):
+        reader = pypdf.PdfReader(io.BytesIO(data))
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the Streamlit server is multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=PDF_PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor) -> None:
+    # A worker died (e.g. killed for memory); the pool is unusable for everyone, so the next
+    # call starts a fresh one
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Extra wait for a chunk past the deadline, for its worker to stop it and report back
+_TIMEOUT_GRACE_SECONDS = 1.0
+
+
+def extract_pdf_text(data: bytes, max_pages: Optional[int] = None, max_bytes: Optional[int] = None,
+                     timeout: Optional[float] = None) -> str:
+    check_size(data, max_bytes)
+    deadline = time.monotonic() + (PARSE_TIMEOUT_SECONDS if timeout is None else timeout)
+    reader = _open_pdf(data, max_pages)
+    page_count = len(reader.pages)
+    if page_count <= INLINE_MAX_PAGES and len(data) <= INLINE_MAX_BYTES and _can_alarm():
+        with _alarm(deadline - time.monotonic()):
+            return "".join(page.extract_text() or "" for page in reader.pages)
+
+    # Each chunk re-opens the document, which only pays off when the chunks can run in parallel
+    parallel = page_count >= PARALLEL_MIN_PAGES and (os.cpu_count() or 1) > 1
+    chunk_pages = PAGES_PER_CHUNK if parallel else max(1, page_count)
+
+    pool = _get_pool()
+    futures = [
+        pool.submit(_extract_page_range, data, start, min(start + chunk_pages, page_count), deadline - time.monotonic())
+        for start in range(0, page_count, chunk_pages)
+    ]
+    parts: List[str] = []
+    try:
+        for future in futures:
+            parts.extend(future.result(timeout=max(0.0, deadline - time.monotonic()) + _TIMEOUT_GRACE_SECONDS))
+    except FutureTimeoutError:
+        raise ParseTimeoutError("Extracting text from the PDF took too long.")
+    except BrokenProcessPool:
+        _discard_broken_pool(pool)
+        raise DocumentParseError("The PDF could not be read.")
+    finally:
+        # Only this document's chunks; the pool's workers are shared with other sessions
+        for future in futures:
+            future.cancel()
+    return "".join(parts)
+
+
+# --- DOCX ---
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_HEADER_FOOTER = re.compile(r"word/(header|footer)(\d*)\.xml$")
+# Uncompressed XML allowed per byte of upload, so a zip bomb is rejected before it is inflated;
+# small uploads may always expand to the floor
+MAX_DOCX_EXPANSION = 20
+MIN_DOCX_XML_BYTES = 2 * 1024 * 1024
+# How often (in XML events) the deadline is checked
+_DEADLINE_CHECK_EVENTS = 5000
+
+
+class _DocxTextBuilder:
+    """Turns a stream of iterparse events from one WordprocessingML part into lines of text.
+    Paragraphs become lines, table rows become one line of ` | `-separated cells, and paragraphs
+    nested in cells or text boxes are emitted where they occur."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self._paragraphs: List[List[str]] = []
+        self._rows: List[List[str]] = []
+        self._cells: List[List[str]] = []
+        self._skip_depth = 0
+        # w:tab is also the tab stop definition in w:pPr/w:tabs; it is text only inside a run
+        self._run_depth = 0
+
+    def _emit(self, line: str) -> None:
+        if self._cells:
+            self._cells[-1].append(line)
+        else:
+            self.lines.append(line)
+
+    def start(self, tag: str) -> None:
+        if tag == _MC_FALLBACK:
+            # Legacy copy of the mc:Choice content (e.g. VML text boxes); reading both would duplicate text
+            self._skip_depth += 1
+        elif self._skip_depth:
+            return
+        elif tag == _W + "p":
+            self._paragraphs.append([])
+        elif tag == _W + "r":
+            self._run_depth += 1
+        elif tag == _W + "tr":
+            self._rows.append([])
+        elif tag == _W + "tc":
+            self._cells.append([])
+
+    def end(self, element) -> None:
+        tag = element.tag
+        if tag == _MC_FALLBACK:
+            self._skip_depth -= 1
+            return
+        if self._skip_depth:
+            return
+        if tag == _W + "t":
+            if self._paragraphs and element.text:
+                self._paragraphs[-1].append(element.text)
+        elif tag in (_W + "tab", _W + "ptab"):
+            if self._paragraphs and self._run_depth:
+                self._paragraphs[-1].append("\t")
+        elif tag == _W + "cr" or (tag == _W + "br" and element.get(_W + "type", "textWrapping") == "textWrapping"):
+            if self._paragraphs:
+                self._paragraphs[-1].append("\n")
+        elif tag == _W + "noBreakHyphen":
+            if self._paragraphs:
+                self._paragraphs[-1].append("-")
+        elif tag == _W + "r":
+            self._run_depth -= 1
+        elif tag == _W + "p":
+            self._emit("".join(self._paragraphs.pop()))
+        elif tag == _W + "tc":
+            cell = " ".join(line for line in self._cells.pop() if line)
+            if self._rows:
+                self._rows[-1].append(cell)
+        elif tag == _W + "tr":
+            self._emit(" | ".join(self._rows.pop()))
+
+
+def _docx_part_lines(archive: zipfile.ZipFile, name: str, deadline: float) -> List[str]:
+    builder = _DocxTextBuilder()
+    with archive.open(name) as part:
+        for count, (event, element) in enumerate(ElementTree.iterparse(part, events=("start", "end")), 1):
+            if count % _DEADLINE_CHECK_EVENTS == 0 and time.monotonic() > deadline:
+                raise ParseTimeoutError("Extracting text from the DOCX took too long.")
+            if event == "start":
+                builder.start(element.tag)
+                continue
+            builder.end(element)
+            if element.tag in (_W + "p", _W + "tbl"):
+                element.clear()  # Finished blocks are not needed again; keeps memory flat
+    return builder.lines
+
+
+def _header_footer_parts(names: List[str], kind: str) -> List[str]:
+    parts = [(m.group(2), name) for name in names for m in [_HEADER_FOOTER.match(name)] if m and m.group(1) == kind]
+    return [name for _, name in sorted(parts, key=lambda p: int(p[0] or 0))]
+
+
+def extract_docx_text(data: bytes, max_bytes: Optional[int] = None, timeout: Optional[float] = None) -> str:
+    """Text of a DOCX read straight from its XML parts: headers, then the body in document order
+    (paragraphs, table rows, text boxes), then footers. One line per paragraph or table row."""
+    check_size(data, max_bytes)
+    deadline = time.monotonic() + (PARSE_TIMEOUT_SECONDS if timeout is None else timeout)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = archive.namelist()
+        if "word/document.xml" not in names:
+            raise DocumentParseError("The file is not a Word document (word/document.xml is missing).")
+        parts = _header_footer_parts(names, "header") + ["word/document.xml"] + _header_footer_parts(names, "footer")
+        budget = max(len(data) * MAX_DOCX_EXPANSION, MIN_DOCX_XML_BYTES)
+        if sum(archive.getinfo(name).file_size for name in parts) > budget:
+            raise DocumentTooLargeError("The document expands to too much text to be a resume.")
+
+        lines: List[str] = []
+        seen_parts = set()
+        for name in parts:
+            part_lines = _docx_part_lines(archive, name, deadline)
+            if name != "word/document.xml":
+                # Sections often repeat the same header/footer (default, first page, even pages)
+                key = "\n".join(part_lines)
+                if not key.strip() or key in seen_parts:
+                    continue
+                seen_parts.add(key)
+            lines.extend(part_lines)
+    return "".join(line + "\n" for line in lines)
+
+
+# --- Resume uploads ---
+
+# Stage name parsing is timed under, shared with the crewai tool that wraps it
+PARSE_STAGE = "Resume Parser Tool"
+
+
+class ParsedTextCache:
+    """Bounded LRU cache of extracted resume text, keyed by a hash of the file bytes."""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(data: bytes, extension: str) -> str:
+        return f"{extension}:{hashlib.sha256(data).hexdigest()}"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Module-level so every Streamlit session in the process shares it
+parsed_text_cache = ParsedTextCache(maxsize=int(os.getenv("RESUME_TEXT_CACHE_SIZE", "64")))
+
+
+def parse_resume_bytes(data: Union[bytes, BinaryIO], file_name: str) -> str:
+    """Extracts text from an in-memory PDF or DOCX; `file_name` is only used for its extension.
+    Problems are returned as an "Error: ..." message rather than raised."""
+    with timed_stage(PARSE_STAGE):
+        return _parse_resume_bytes(data, file_name)
+
+
+def _parse_resume_bytes(data: Union[bytes, BinaryIO], file_name: str) -> str:
+    if not isinstance(data, (bytes, bytearray)):
+        data = data.getvalue() if hasattr(data, "getvalue") else data.read()
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in (".pdf", ".docx"):
+        return "Error: Unsupported file type. Please provide a PDF or DOCX file path."
+
+    try:
+        check_size(data)
+    except DocumentParseError as e:
+        return f"Error: {e}"
+
+    cache_key = ParsedTextCache.key_for(data, extension)
+    cached = parsed_text_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        if extension == ".pdf":
+            text = extract_pdf_text(data)
+        else:
+            text = extract_docx_text(data)
+    except DocumentParseError as e:
+        return f"Error: {e}"
+    except Exception as e:
+        return f"Error parsing resume {file_name}: {str(e)}"
+
+    if not text.strip():
+        return "Error: Could not extract text from the resume. The file might be empty, scanned as an image, or corrupted."
+    parsed_text_cache.put(cache_key, text)
+    return text
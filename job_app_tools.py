@@ -1,14 +1,15 @@
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-import pypdf
-import docx # python-docx
+from typing import BinaryIO, Union
 import os
+# Parsing lives in document_parsing, which the app uses directly without importing crewai
+from document_parsing import PARSE_STAGE, parse_resume_bytes
 
 class FilePathInput(BaseModel):
     file_path: str = Field(..., description="The local file path to the document (PDF or DOCX).")
 
 class ResumeParserTool(BaseTool):
-    name: str = "Resume Parser Tool"
+    name: str = PARSE_STAGE
     description: str = (
         "Parses a resume file (PDF or DOCX) provided as a file path and extracts its text content. "
         "Returns the full text content of the resume."
@@ -16,25 +17,14 @@ class ResumeParserTool(BaseTool):
     args_schema: type[BaseModel] = FilePathInput
 
     def _run(self, file_path: str) -> str:
-        text = ""
         try:
             if not os.path.exists(file_path):
                 return f"Error: File not found at path: {file_path}"
-
-            if file_path.lower().endswith(".pdf"):
-                with open(file_path, "rb") as f:
-                    reader = pypdf.PdfReader(f)
-                    for page in reader.pages:
-                        text += page.extract_text() or ""
-            elif file_path.lower().endswith(".docx"):
-                doc = docx.Document(file_path)
-                for para in doc.paragraphs:
-                    text += para.text + "\n"
-            else:
-                return "Error: Unsupported file type. Please provide a PDF or DOCX file path."
-            
-            if not text.strip():
-                return "Error: Could not extract text from the resume. The file might be empty, scanned as an image, or corrupted."
-            return text
+            with open(file_path, "rb") as f:
+                return self.parse_bytes(f.read(), file_path)
         except Exception as e:
-            return f"Error parsing resume at path {file_path}: {str(e)}"
\ No newline at end of file
+            return f"Error parsing resume at path {file_path}: {str(e)}"
+
+    def parse_bytes(self, data: Union[bytes, BinaryIO], file_name: str) -> str:
+        """Extracts text from an in-memory PDF or DOCX; `file_name` is only used for its extension."""
+        return parse_resume_bytes(data, file_name)
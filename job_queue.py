@@ -0,0 +1,281 @@
+import atexit
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from metrics import quantile
+
+# Local job queue for pipeline runs, so a crew run does not block the Streamlit script thread of
+# the user who started it. The app submits a job and keeps its id; worker processes
+# (job_worker.py) claim queued jobs, record stage-by-stage progress and partial outputs, and store
+# the result, which survives reruns and browser refreshes. The queue lives in SQLite (WAL mode),
+# so the app and any number of worker processes can share it.
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+STATUSES = (QUEUED, RUNNING, SUCCEEDED, FAILED)
+
+# Stage states recorded in a job's progress
+STAGE_RUNNING = "running"
+STAGE_DONE = "done"
+STAGE_SKIPPED = "skipped"
+STAGE_RESTORED = "restored"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    status: str
+    payload: Dict[str, Any]
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    heartbeat_at: Optional[float] = None
+    worker_id: Optional[str] = None
+    attempts: int = 0
+    # Stage name -> one of the STAGE_* states, in the order the stages started
+    progress: Dict[str, str] = field(default_factory=dict)
+    # Agent role -> text generated so far, for the streaming agents
+    partial: Dict[str, str] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        """Time spent queued before a worker picked the job up."""
+        return None if self.started_at is None else self.started_at - self.submitted_at
+
+
+_COLUMNS = ("id", "status", "payload", "submitted_at", "started_at", "finished_at", "heartbeat_at",
+            "worker_id", "attempts", "progress", "partial", "result", "error")
+
+
+def _job(row) -> Job:
+    values = dict(zip(_COLUMNS, row))
+    for name in ("payload", "progress", "partial", "result"):
+        values[name] = json.loads(values[name]) if values[name] is not None else None
+    return Job(**values)
+
+
+class JobQueue:
+    """SQLite-backed FIFO of pipeline jobs with bounded depth and recovery of jobs whose worker died."""
+
+    def __init__(self, path: str, max_depth: int = 50, stale_after_seconds: float = 120.0,
+                 max_attempts: int = 2, retention_seconds: float = 86400.0):
+        self.path = path
+        self.max_depth = max_depth
+        self.stale_after_seconds = stale_after_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit, with explicit BEGIN IMMEDIATE where a read and a write must be atomic
+        # across processes
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, submitted_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, heartbeat_at REAL, worker_id TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "progress TEXT NOT NULL DEFAULT '{}', partial TEXT NOT NULL DEFAULT '{}', result TEXT, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_submitted ON jobs (status, submitted_at)")
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = work()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return value
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        """Queues a job and returns its id; raises QueueFullError when max_depth jobs are waiting."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        def work():
+            self._conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                               (now - self.retention_seconds,))
+            (depth,) = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()
+            if depth >= self.max_depth:
+                raise QueueFullError(f"{depth} jobs are already waiting; try again in a few minutes.")
+            self._conn.execute("INSERT INTO jobs (id, status, payload, submitted_at) VALUES (?, ?, ?, ?)",
+                               (job_id, QUEUED, json.dumps(payload), now))
+
+        self._transaction(work)
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Job]:
+        """Marks the oldest queued job as running on `worker_id` and returns it, or None."""
+        now = time.time()
+
+        def work():
+            self._requeue_stale(now)
+            row = self._conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY submitted_at LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, started_at = ?, heartbeat_at = ?, attempts = attempts + 1, "
+                "progress = '{}', partial = '{}' WHERE id = ?",
+                (RUNNING, worker_id, now, now, row[0]),
+            )
+            return row[0]
+
+        job_id = self._transaction(work)
+        return self.get(job_id) if job_id else None
+
+    def _requeue_stale(self, now: float) -> None:
+        # A running job whose worker stopped sending heartbeats goes back to the queue, unless
+        # it has used up its attempts (it may be what killed the worker)
+        stale = now - self.stale_after_seconds
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, error = 'The worker running this job stopped responding.' "
+            "WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+            (FAILED, now, RUNNING, stale, self.max_attempts),
+        )
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL WHERE status = ? AND heartbeat_at < ?",
+            (QUEUED, RUNNING, stale),
+        )
+
+    def heartbeat(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING))
+
+    def _update_json(self, job_id: str, column: str, key: str, value: Any) -> None:
+        def work():
+            row = self._conn.execute(f"SELECT {column} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            data = json.loads(row[0])
+            data[key] = value
+            self._conn.execute(f"UPDATE jobs SET {column} = ?, heartbeat_at = ? WHERE id = ?",
+                               (json.dumps(data), time.time(), job_id))
+
+        self._transaction(work)
+
+    def set_stage(self, job_id: str, stage: str, state: str) -> None:
+        self._update_json(job_id, "progress", stage, state)
+
+    def set_partial(self, job_id: str, role: str, text: str) -> None:
+        self._update_json(job_id, "partial", role, text)
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, finished_at = ?, result = ?, partial = '{}' WHERE id = ? AND status = ?",
+                               (SUCCEEDED, time.time(), json.dumps(result), job_id, RUNNING))
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ? AND status = ?",
+                               (FAILED, time.time(), error, job_id, RUNNING))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row is not None else None
+
+    def position(self, job_id: str) -> int:
+        """How many queued jobs are ahead of `job_id` (0 once it is running or finished)."""
+        with self._lock:
+            (ahead,) = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND submitted_at < "
+                "(SELECT submitted_at FROM jobs WHERE id = ? AND status = ?)",
+                (QUEUED, job_id, QUEUED),
+            ).fetchone()
+        return ahead
+
+    def stats(self) -> Dict[str, float]:
+        """Jobs per status, the age of the oldest queued job, and queue wait and run time
+        percentiles over the jobs that finished in the last hour."""
+        now = time.time()
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            (oldest,) = self._conn.execute("SELECT MIN(submitted_at) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()
+            recent = self._conn.execute(
+                "SELECT started_at - submitted_at, finished_at - started_at FROM jobs "
+                "WHERE finished_at > ? AND started_at IS NOT NULL", (now - 3600,)
+            ).fetchall()
+        stats: Dict[str, float] = {status: counts.get(status, 0) for status in STATUSES}
+        stats["oldest_queued_seconds"] = now - oldest if oldest is not None else 0.0
+        for name, values in (("wait", [row[0] for row in recent]), ("run", [row[1] for row in recent])):
+            for q in (0.5, 0.95):
+                stats[f"{name}_seconds_p{round(q * 100)}"] = quantile(values, q)
+        return stats
+
+    def recent(self, limit: int = 20) -> List[Job]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs ORDER BY submitted_at DESC LIMIT ?", (limit,)).fetchall()
+        return [_job(row) for row in rows]
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def job_queue_path() -> str:
+    return os.getenv("JOB_QUEUE_PATH", ".cache/jobs.sqlite")
+
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide queue at JOB_QUEUE_PATH."""
+    global _job_queue
+    path = job_queue_path()
+    with _job_queue_lock:
+        if _job_queue is None or _job_queue.path != path:
+            _job_queue = JobQueue(
+                path,
+                max_depth=int(os.getenv("JOB_QUEUE_MAX_DEPTH", "50")),
+                stale_after_seconds=float(os.getenv("JOB_STALE_SECONDS", "120")),
+            )
+        return _job_queue
+
+
+_worker_pool: Optional[subprocess.Popen] = None
+_worker_pool_lock = threading.Lock()
+
+
+def _stop_worker_pool() -> None:
+    pool = _worker_pool
+    if pool is not None and pool.poll() is None:
+        pool.terminate()
+        try:
+            pool.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            pool.kill()
+
+
+def start_worker_pool(count: int) -> subprocess.Popen:
+    """Starts `count` workers (job_worker.py) in the background, for the app to run alongside
+    itself, or returns the pool already running. The pool stops when this process exits, and
+    exits by itself if this process dies without cleaning up. It lives here rather than in
+    job_worker so the app does not import the pipeline."""
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            atexit.register(_stop_worker_pool)
+        if _worker_pool is None or _worker_pool.poll() is not None:
+            _worker_pool = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_worker.py"),
+                                             "--workers", str(count), "--exit-with-parent"])
+        return _worker_pool
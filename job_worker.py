@@ -0,0 +1,187 @@
+try:
+    __import__('pysqlite3')
+    import sys
+    sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
+except ImportError:
+    pass
+import argparse
+import contextvars
+import functools
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+from crewai import Crew, Process
+from dotenv import load_dotenv
+from agent_llm import token_sink
+from agent_pool import get_agent_pool
+from context_builder import build_task_context
+from crew_scheduler import run_task_graph, stage_name
+from document_parsing import PARSE_STAGE
+from job_queue import STAGE_DONE, STAGE_RESTORED, STAGE_RUNNING, STAGE_SKIPPED, Job, JobQueue, get_job_queue
+from metrics import record_stage_time, track_run
+from pipeline import (application_outputs, build_tasks, configure_llm, format_run_report,
+                      match_analysis_gate, restore_analyses, save_analyses, structured_executor)
+from profile_store import get_profile_store
+
+# Worker processes for the job queue. Each worker claims one queued job at a time and runs the
+# pipeline for it, so the number of workers bounds how many crews run at once. The app starts a
+# pool of JOB_WORKERS workers next to itself; with JOB_WORKERS=0 run them separately instead:
+#
+#   python job_worker.py --workers 4
+
+# Seconds between writes of a streaming agent's partial output to the queue
+PARTIAL_OUTPUT_INTERVAL = 0.5
+
+
+def _partial_output_sink(queue: JobQueue, job_id: str) -> Callable[[str, str], None]:
+    last_write = {}
+
+    def sink(role: str, text: str) -> None:
+        now = time.monotonic()
+        if now - last_write.get(role, 0.0) >= PARTIAL_OUTPUT_INTERVAL:
+            last_write[role] = now
+            queue.set_partial(job_id, role, text)
+
+    return sink
+
+
+def run_job(job: Job, queue: JobQueue, llm_identifier: str) -> dict:
+    """Runs the pipeline for `job`, recording each stage's progress on the queue, and returns the
+    outputs the app shows."""
+    payload = job.payload
+    resume_text, job_description = payload["resume_text"], payload["job_description"]
+    execution_mode = payload.get("execution_mode", "parallel")
+    token_sink.set(_partial_output_sink(queue, job.id))
+
+    # The worker's agents are built with its first job and reused by the ones after it
+    agent_pool = get_agent_pool(llm_identifier, verbose=False)
+    with track_run("pipeline", execution_mode=execution_mode, job_id=job.id, queue_wait_seconds=job.wait_seconds) as run_metrics, \
+            agent_pool.lease() as agents:
+        if "parse_seconds" in payload:
+            # The app parsed the upload before submitting the job
+            record_stage_time(PARSE_STAGE, payload["parse_seconds"])
+        tasks = build_tasks(agents, resume_text, job_description)
+        profile_store = get_profile_store()
+        restored_stages = restore_analyses(tasks, resume_text, job_description, profile_store)
+        for stage in restored_stages:
+            queue.set_stage(job.id, stage, STAGE_RESTORED)
+        pending_tasks = tasks.pending()
+
+        schedule_result = None
+        if execution_mode == "sequential":
+            # The crew runs the tasks in order, so each task's callback marks it done and the next one running
+            def mark_done(index: int, output) -> None:
+                queue.set_stage(job.id, stage_name(pending_tasks[index]), STAGE_DONE)
+                if index + 1 < len(pending_tasks):
+                    queue.set_stage(job.id, stage_name(pending_tasks[index + 1]), STAGE_RUNNING)
+
+            for index, task in enumerate(pending_tasks):
+                task.callback = functools.partial(mark_done, index)
+            if pending_tasks:
+                queue.set_stage(job.id, stage_name(pending_tasks[0]), STAGE_RUNNING)
+            crew = Crew(agents=[task.agent for task in pending_tasks], tasks=pending_tasks, process=Process.sequential)
+            crew.kickoff()
+        else:
+            execute = structured_executor(tasks, payload.get("extraction_mode", "native"))
+            should_run = match_analysis_gate(tasks, payload.get("match_analysis_mode", "borderline"))
+
+            def execute_with_progress(task, context: str) -> None:
+                queue.set_stage(job.id, stage_name(task), STAGE_RUNNING)
+                execute(task, context)
+                queue.set_stage(job.id, stage_name(task), STAGE_DONE)
+
+            def should_run_with_progress(task) -> bool:
+                if should_run(task):
+                    return True
+                queue.set_stage(job.id, stage_name(task), STAGE_SKIPPED)
+                return False
+
+            schedule_result = run_task_graph(pending_tasks, should_run=should_run_with_progress,
+                                             build_context=build_task_context, execute=execute_with_progress)
+        save_analyses(tasks, resume_text, job_description, profile_store)
+        report = format_run_report(tasks, restored_stages, schedule_result, run_metrics=run_metrics)
+    if job.wait_seconds is not None:
+        report += f"\nQueued for {job.wait_seconds:.2f}s before a worker picked the job up"
+    return {**application_outputs(tasks), "stage_timings_report": report}
+
+
+def _heartbeat(queue: JobQueue, job_id: str, stop: threading.Event) -> None:
+    interval = queue.stale_after_seconds / 4
+    while not stop.wait(interval):
+        queue.heartbeat(job_id)
+
+
+def worker_loop(worker_id: Optional[str] = None, poll_interval: float = 1.0) -> None:
+    load_dotenv()
+    llm_identifier = configure_llm()
+    if not llm_identifier:
+        print("Error: GEMINI_API_KEY is not set.", file=sys.stderr)
+        return
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = get_job_queue()
+    while True:
+        job = queue.claim(worker_id)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        stop_heartbeat = threading.Event()
+        threading.Thread(target=_heartbeat, args=(queue, job.id, stop_heartbeat), daemon=True).start()
+        try:
+            # A fresh context per job, so the token sink and metrics run do not leak into the next one
+            result = contextvars.Context().run(run_job, job, queue, llm_identifier)
+            queue.complete(job.id, result)
+        except Exception as e:
+            queue.fail(job.id, f"{type(e).__name__}: {e}")
+        finally:
+            stop_heartbeat.set()
+
+
+def _run_worker(poll_interval: float) -> None:
+    try:
+        worker_loop(poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(count: int, poll_interval: float = 1.0, exit_with_parent: bool = False) -> None:
+    """Runs `count` worker processes until this process is interrupted or terminated, or, with
+    `exit_with_parent`, until the process that started it has gone."""
+    context = multiprocessing.get_context("spawn")
+    # The workers share the API key's rate limits; each process's LLM gateway takes its share
+    os.environ["LLM_RATE_LIMIT_PROCESSES"] = str(count)
+    workers: List[multiprocessing.Process] = [context.Process(target=_run_worker, args=(poll_interval,)) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    parent = os.getppid()
+    try:
+        while any(worker.is_alive() for worker in workers):
+            # An orphaned process is re-parented, so a changed parent id means the app is gone
+            if exit_with_parent and os.getppid() != parent:
+                break
+            time.sleep(1.0)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run pipeline jobs from the job queue.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("JOB_WORKERS", "2")) or 2, help="How many jobs to run at the same time.")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between checks of an empty queue.")
+    parser.add_argument("--exit-with-parent", action="store_true", help="Stop when the process that started the workers exits.")
+    args = parser.parse_args(argv)
+    run_workers(args.workers, args.poll_interval, args.exit_with_parent)
+
+
+if __name__ == "__main__":
+    main()
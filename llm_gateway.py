@@ -0,0 +1,221 @@
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from metrics import record_throttle
+
+# One gateway per process in front of every model call. It enforces per-model requests- and
+# tokens-per-minute limits with token buckets, sends every request through one pooled HTTP
+# client, lets identical requests that are in flight at the same time share a single call, and
+# retries rate-limited (429) calls with jittered exponential backoff.
+#
+# Limits come from LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE (per model, unset = no limit).
+# When several worker processes share one API key, LLM_RATE_LIMIT_PROCESSES divides the limits
+# between them; the job worker pool sets it. LLM_RATE_LIMIT_BURST_SECONDS caps how much of the
+# quota can go out at once: a bucket that starts with a full minute's worth could send nearly two
+# minutes' worth within one sliding minute, so the default is a tenth of that.
+
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+
+class TokenBucket:
+    """Refills at `per_minute` tokens per minute and holds up to `burst_seconds` worth of them."""
+
+    def __init__(self, per_minute: float, burst_seconds: float = 6.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float) -> float:
+        """Takes `amount` tokens, waiting for them if necessary; returns the seconds waited.
+        A request larger than the bucket waits for a full bucket rather than forever."""
+        needed = min(amount, self.capacity)
+        started = time.monotonic()
+        with self._condition:
+            self._refill()
+            while self.tokens < needed:
+                self._condition.wait((needed - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+        return time.monotonic() - started
+
+    def debit(self, amount: float) -> None:
+        """Takes tokens used after the fact (completion tokens); the balance may go negative,
+        which holds back later requests."""
+        with self._condition:
+            self._refill()
+            self.tokens -= amount
+
+
+@dataclass
+class _InFlight:
+    done: threading.Event = field(default_factory=threading.Event)
+    response: Any = None
+    error: Optional[BaseException] = None
+
+
+def _env_limit(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    if not value or float(value) <= 0:
+        return None
+    return float(value) / max(1, int(os.getenv("LLM_RATE_LIMIT_PROCESSES", "1")))
+
+
+def _count_tokens(model: str, messages: Optional[List[Dict[str, Any]]] = None, text: Optional[str] = None) -> int:
+    import litellm
+
+    try:
+        return litellm.token_counter(model=model, messages=messages) if messages is not None else litellm.token_counter(model=model, text=text)
+    except Exception:
+        return len(str(messages if messages is not None else text)) // 4
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, max_connections: int = 20, burst_seconds: float = 6.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.calls = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._http_client = None
+
+    @property
+    def http_client(self):
+        """litellm HTTP handler shared by every call, so connections to the provider are kept
+        alive and reused instead of being opened per request or per cached client."""
+        if self._http_client is None:
+            import httpx
+            from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+            with self._lock:
+                if self._http_client is None:
+                    limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+                    self._http_client = HTTPHandler(client=httpx.Client(limits=limits, timeout=httpx.Timeout(600.0, connect=5.0)))
+        return self._http_client
+
+    def _bucket(self, model: str, kind: str, per_minute: Optional[float]) -> Optional[TokenBucket]:
+        if per_minute is None:
+            return None
+        with self._lock:
+            if (model, kind) not in self._buckets:
+                self._buckets[(model, kind)] = TokenBucket(per_minute, self.burst_seconds)
+            return self._buckets[(model, kind)]
+
+    def _send(self, model: str, role: str, messages: List[Dict[str, Any]], send: Callable[[], Any]) -> Any:
+        requests = self._bucket(model, "requests", self.requests_per_minute)
+        tokens = self._bucket(model, "tokens", self.tokens_per_minute)
+        prompt_tokens = _count_tokens(model, messages) if tokens is not None else 0
+        for attempt in range(self.max_retries + 1):
+            waited = requests.acquire(1) if requests is not None else 0.0
+            if tokens is not None:
+                waited += tokens.acquire(prompt_tokens)
+            if waited:
+                record_throttle(role, waited)
+            try:
+                with self._lock:
+                    self.calls += 1
+                response = send()
+            except Exception as e:
+                import litellm
+
+                if not isinstance(e, litellm.RateLimitError) or attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.rate_limited += 1
+                # Full jitter, so callers throttled together do not retry together
+                delay = _retry_after(e) or random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                record_throttle(role, delay, rate_limited=True)
+                time.sleep(delay)
+                continue
+            if tokens is not None and isinstance(response, str):
+                tokens.debit(_count_tokens(model, text=response))
+            return response
+
+    def call(self, model: str, role: str, messages: List[Dict[str, Any]], send: Callable[[], Any],
+             key: Optional[str] = None) -> Tuple[Any, bool]:
+        """Runs `send` (one model call) under the model's limits. Calls with the same `key`
+        that overlap share the first one's response; pass no key for calls that must not be
+        shared. Returns the response and whether it was shared from another caller's call."""
+        if key is None:
+            return self._send(model, role, messages, send), False
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.response, True
+        try:
+            in_flight.response = self._send(model, role, messages, send)
+            return in_flight.response, False
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "rate_limited": self.rate_limited}
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def set_gateway(gateway: Optional[LLMGateway]) -> None:
+    """Replaces the process-wide gateway; None rebuilds it from the environment on next use."""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
+
+
+def get_gateway() -> Optional[LLMGateway]:
+    """Returns the process-wide gateway, or None when LLM_GATEWAY_MODE is "off"."""
+    global _gateway
+    if os.getenv("LLM_GATEWAY_MODE", "shared").lower() == "off":
+        return None
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(
+                requests_per_minute=_env_limit("LLM_REQUESTS_PER_MINUTE"),
+                tokens_per_minute=_env_limit("LLM_TOKENS_PER_MINUTE"),
+                max_retries=int(os.getenv("LLM_MAX_RATE_LIMIT_RETRIES", str(DEFAULT_MAX_RETRIES))),
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+                burst_seconds=float(os.getenv("LLM_RATE_LIMIT_BURST_SECONDS", "6")),
+            )
+        return _gateway
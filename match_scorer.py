@@ -0,0 +1,223 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from models import ResumeDetails, JobDescriptionDetails
+
+# Deterministic, local resume-vs-JD scoring. Runs in milliseconds with no model calls, so it
+# can stand in for the LLM match analysis on clear-cut cases and rank many JDs in batch mode.
+
+# Scores inside this range are close enough to call that the LLM assessment is still worth it
+BORDERLINE_RANGE = (40.0, 65.0)
+
+MUST_HAVE_WEIGHT = 0.5
+PREFERRED_WEIGHT = 0.2
+RESPONSIBILITY_WEIGHT = 0.3
+
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "aws": "amazon web services",
+    "gcp": "google cloud platform",
+    "ci/cd": "continuous integration",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or our that the their "
+    "this to we will with you your who what which using use strong experience ability skills "
+    "work working knowledge including etc e.g i.e plus years year required preferred need needs "
+    "looking ideal candidate role team responsibilities requirements build must".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = (t.rstrip(".-/") for t in _TOKEN_RE.findall(text.lower()))
+    return [t for t in tokens if t and t not in STOPWORDS]
+
+
+def normalize_skill(skill: str) -> str:
+    skill = re.sub(r"\s+", " ", skill.lower().strip(" .,;:()[]"))
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def canonical_tokens(text: str) -> set:
+    """Tokens of `text` plus the canonical form of every alias among them (and its words), so a
+    bullet mentioning "Postgres" or "ML" matches a JD asking for "PostgreSQL" or "machine learning"."""
+    tokens = set()
+    for token in tokenize(text):
+        tokens.add(token)
+        alias = SKILL_ALIASES.get(token)
+        if alias is not None:
+            tokens.add(alias)
+            tokens.update(tokenize(alias))
+    return tokens
+
+
+def _skill_present(skill: str, resume_skills: set, resume_tokens: set, resume_text: str) -> bool:
+    if skill in resume_skills:
+        return True
+    skill_tokens = tokenize(skill)
+    if not skill_tokens:
+        return False
+    if len(skill_tokens) == 1:
+        return skill_tokens[0] in resume_tokens
+    return skill in resume_text or all(t in resume_tokens for t in skill_tokens)
+
+
+def _coverage(required: Iterable[str], resume_skills: set, resume_tokens: set, resume_text: str) -> Tuple[List[str], List[str]]:
+    matched, missing = [], []
+    for skill in required:
+        # Try the canonical form and the literal one, so "AWS" also matches a bullet mentioning "aws"
+        forms = {normalize_skill(skill), skill.lower().strip()}
+        if any(_skill_present(form, resume_skills, resume_tokens, resume_text) for form in forms):
+            matched.append(skill)
+        else:
+            missing.append(skill)
+    return matched, missing
+
+
+def tfidf_matrix(documents: Sequence[str]) -> Tuple[np.ndarray, Dict[str, int]]:
+    """Row-normalized TF-IDF matrix (sublinear tf, smoothed idf) for `documents`, and its vocabulary."""
+    tokenized = [tokenize(doc) for doc in documents]
+    vocabulary: Dict[str, int] = {}
+    for tokens in tokenized:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    matrix = np.zeros((len(documents), max(len(vocabulary), 1)))
+    for row, tokens in enumerate(tokenized):
+        for token, count in Counter(tokens).items():
+            matrix[row, vocabulary[token]] = 1.0 + math.log(count)
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms, vocabulary
+
+
+def responsibility_similarity(jd_sentences: Sequence[str], resume_sentences: Sequence[str]) -> float:
+    """Mean over JD sentences of the best cosine similarity with any resume sentence."""
+    if not jd_sentences or not resume_sentences:
+        return 0.0
+    matrix, _ = tfidf_matrix(list(jd_sentences) + list(resume_sentences))
+    similarities = matrix[: len(jd_sentences)] @ matrix[len(jd_sentences):].T
+    return float(similarities.max(axis=1).mean())
+
+
+@dataclass
+class MatchScore:
+    score: float  # 0-100
+    must_have_coverage: float
+    preferred_coverage: Optional[float]
+    responsibility_similarity: float
+    matched_skills: List[str] = field(default_factory=list)
+    missing_skills: List[str] = field(default_factory=list)
+
+    @property
+    def level(self) -> str:
+        if self.score >= BORDERLINE_RANGE[1]:
+            return "Strong Match"
+        if self.score >= BORDERLINE_RANGE[0]:
+            return "Moderate Match"
+        return "Needs Significant Tailoring"
+
+    def is_borderline(self) -> bool:
+        return BORDERLINE_RANGE[0] <= self.score < BORDERLINE_RANGE[1]
+
+    def format_markdown(self) -> str:
+        lines = [f"**Local match score: {self.score:.0f}/100 ({self.level})**"]
+        if self.matched_skills:
+            lines.append("- Matched skills: " + ", ".join(self.matched_skills))
+        if self.missing_skills:
+            lines.append("- Missing skills: " + ", ".join(self.missing_skills))
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "score": round(self.score, 1),
+            "level": self.level,
+            "must_have_coverage": round(self.must_have_coverage, 3),
+            "preferred_coverage": None if self.preferred_coverage is None else round(self.preferred_coverage, 3),
+            "responsibility_similarity": round(self.responsibility_similarity, 3),
+            "matched_skills": self.matched_skills,
+            "missing_skills": self.missing_skills,
+        }
+
+
+def _weighted_score(must_have: float, preferred: Optional[float], similarity: float) -> float:
+    weights = [(MUST_HAVE_WEIGHT, must_have), (RESPONSIBILITY_WEIGHT, similarity)]
+    if preferred is not None:
+        weights.append((PREFERRED_WEIGHT, preferred))
+    total_weight = sum(w for w, _ in weights)
+    return 100.0 * sum(w * v for w, v in weights) / total_weight
+
+
+def score_match(resume: ResumeDetails, jd: JobDescriptionDetails) -> MatchScore:
+    """Scores structured resume details against structured job description details."""
+    resume_sentences = [resume.summary or ""] + [
+        f"{experience.role} {responsibility}"
+        for experience in resume.work_experiences
+        for responsibility in experience.responsibilities
+    ] + list(resume.projects_or_certifications or [])
+    resume_sentences = [s for s in resume_sentences if s.strip()]
+    resume_text = " ".join([*resume.skills, *resume_sentences]).lower()
+    resume_skills = {normalize_skill(s) for s in resume.skills}
+    resume_tokens = canonical_tokens(resume_text)
+
+    matched_must, missing_must = _coverage(jd.must_have_skills, resume_skills, resume_tokens, resume_text)
+    matched_pref, missing_pref = _coverage(jd.preferred_skills or [], resume_skills, resume_tokens, resume_text)
+    must_have = len(matched_must) / len(jd.must_have_skills) if jd.must_have_skills else 1.0
+    preferred = len(matched_pref) / len(jd.preferred_skills) if jd.preferred_skills else None
+    similarity = responsibility_similarity(jd.key_responsibilities, resume_sentences)
+
+    return MatchScore(
+        score=_weighted_score(must_have, preferred, similarity),
+        must_have_coverage=must_have,
+        preferred_coverage=preferred,
+        responsibility_similarity=similarity,
+        matched_skills=matched_must + matched_pref,
+        missing_skills=missing_must + missing_pref,
+    )
+
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in re.split(r"[\n\r]+|(?<=[.!?;])\s+|\s[•*-]\s", text) if len(s.split()) >= 3]
+
+
+def score_text_match(resume_text: str, jd_text: str, top_keywords: int = 15) -> MatchScore:
+    """Scores raw resume text against raw job description text, for ranking JDs without any
+    model calls. The JD's most distinctive terms stand in for its must-have skills."""
+    jd_sentences = _sentences(jd_text)
+    resume_sentences = _sentences(resume_text)
+    # A term's importance is its summed TF-IDF weight across the JD's own sentences
+    matrix, vocabulary = tfidf_matrix(jd_sentences or [jd_text])
+    importance = matrix.sum(axis=0)
+    keywords = sorted((t for t in vocabulary if not t.isdigit()), key=lambda t: (-importance[vocabulary[t]], t))[:top_keywords]
+    resume_tokens = canonical_tokens(resume_text)
+    matched = [k for k in keywords if normalize_skill(k) in resume_tokens or k in resume_tokens]
+    missing = [k for k in keywords if k not in matched]
+
+    keyword_coverage = len(matched) / len(keywords) if keywords else 0.0
+    similarity = responsibility_similarity(jd_sentences, resume_sentences)
+    return MatchScore(
+        score=_weighted_score(keyword_coverage, None, similarity),
+        must_have_coverage=keyword_coverage,
+        preferred_coverage=None,
+        responsibility_similarity=similarity,
+        matched_skills=matched,
+        missing_skills=missing,
+    )
@@ -0,0 +1,364 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Per-run instrumentation: wall time, LLM calls, tokens, retries and estimated cost per stage.
+# A run is activated with `track_run`; everything executed in that context (including scheduler
+# workers, which copy the caller's context) records into it. Finished runs are appended to the
+# JSONL log at METRICS_LOG_PATH, and aggregates are written in Prometheus text format to
+# METRICS_PROMETHEUS_PATH, together with the job queue's depth. Both are off unless the variables
+# are set. The aggregates cover the last RUN_WINDOW logged runs, so every series is a gauge: its
+# value drops as old runs leave the window.
+
+METRIC_PREFIX = "jobapp"
+QUANTILES = (0.5, 0.95)
+RUN_WINDOW = 1000
+_TAIL_BLOCK_BYTES = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageMetrics:
+    stage: str
+    wall_seconds: float = 0.0
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+    cache_hits: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    # Prompt context sent to the stage, and how much compaction saved against the raw context
+    context_tokens: int = 0
+    context_tokens_saved: int = 0
+    # LLM gateway: calls answered by an identical call already in flight, time held back by the
+    # rate limits or backing off, and calls the provider rejected with a 429
+    coalesced_calls: int = 0
+    throttle_seconds: float = 0.0
+    rate_limited: int = 0
+
+
+class RunMetrics:
+    def __init__(self, kind: str, **attributes: Any):
+        self.run_id = uuid.uuid4().hex
+        self.kind = kind
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.wall_seconds: Optional[float] = None
+        self.stages: Dict[str, StageMetrics] = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _stage(self, name: str) -> StageMetrics:
+        if name not in self.stages:
+            self.stages[name] = StageMetrics(name)
+        return self.stages[name]
+
+    def record_stage_time(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._stage(stage).wall_seconds += seconds
+
+    def record_llm_call(self, stage: str, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                        cost_usd: float = 0.0, cached: bool = False, failed: bool = False, coalesced: bool = False) -> None:
+        with self._lock:
+            metrics = self._stage(stage)
+            metrics.llm_seconds += seconds
+            if failed:
+                metrics.retries += 1
+                return
+            metrics.llm_calls += 1
+            metrics.cache_hits += int(cached)
+            metrics.coalesced_calls += int(coalesced)
+            metrics.prompt_tokens += prompt_tokens
+            metrics.completion_tokens += completion_tokens
+            metrics.cost_usd += cost_usd
+
+    def record_context_tokens(self, stage: str, sent_tokens: int, original_tokens: int) -> None:
+        with self._lock:
+            metrics = self._stage(stage)
+            metrics.context_tokens += sent_tokens
+            metrics.context_tokens_saved += max(0, original_tokens - sent_tokens)
+
+    def record_throttle(self, stage: str, seconds: float, rate_limited: bool = False) -> None:
+        with self._lock:
+            metrics = self._stage(stage)
+            metrics.throttle_seconds += seconds
+            metrics.rate_limited += int(rate_limited)
+
+    def finish(self) -> None:
+        self.wall_seconds = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "wall_seconds": self.wall_seconds,
+            "attributes": self.attributes,
+            "stages": [asdict(s) for s in self.stages.values()],
+        }
+
+    def format_report(self) -> str:
+        lines = []
+        for s in self.stages.values():
+            line = (
+                f"- {s.stage}: {s.llm_calls} LLM calls ({s.cache_hits} cached, {s.retries} retries), "
+                f"{s.prompt_tokens}+{s.completion_tokens} tokens, ~${s.cost_usd:.4f}"
+            )
+            if s.context_tokens:
+                line += f", context {s.context_tokens} tokens ({s.context_tokens_saved} saved)"
+            if s.coalesced_calls:
+                line += f", {s.coalesced_calls} shared with identical calls"
+            if s.throttle_seconds:
+                line += f", {s.throttle_seconds:.2f}s rate limited ({s.rate_limited} 429s)"
+            lines.append(line)
+        total_cost = sum(s.cost_usd for s in self.stages.values())
+        lines.append(f"Estimated cost: ${total_cost:.4f}")
+        return "\n".join(lines)
+
+
+current_run: ContextVar[Optional[RunMetrics]] = ContextVar("current_run", default=None)
+
+
+@contextmanager
+def track_run(kind: str, **attributes: Any) -> Iterator[RunMetrics]:
+    """Records everything executed inside the block into a new run, then exports it."""
+    run = RunMetrics(kind, **attributes)
+    token = current_run.set(run)
+    try:
+        yield run
+    finally:
+        current_run.reset(token)
+        run.finish()
+        export_run(run)
+
+
+def record_stage_time(stage: str, seconds: float) -> None:
+    run = current_run.get()
+    if run is not None:
+        run.record_stage_time(stage, seconds)
+
+
+def record_context_tokens(stage: str, sent_tokens: int, original_tokens: int) -> None:
+    run = current_run.get()
+    if run is not None:
+        run.record_context_tokens(stage, sent_tokens, original_tokens)
+
+
+def record_throttle(stage: str, seconds: float, rate_limited: bool = False) -> None:
+    run = current_run.get()
+    if run is not None:
+        run.record_throttle(stage, seconds, rate_limited)
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage_time(stage, time.perf_counter() - start)
+
+
+def estimate_usage(model: str, messages: List[Dict[str, Any]], response: Any) -> Tuple[int, int, float]:
+    """Prompt tokens, completion tokens and cost in USD, counted locally with litellm's tokenizers
+    and price table. Unknown models are counted but priced at zero."""
+    import litellm
+
+    try:
+        prompt_tokens = litellm.token_counter(model=model, messages=messages)
+        completion_tokens = litellm.token_counter(model=model, text=response) if isinstance(response, str) else 0
+    except Exception:
+        return 0, 0, 0.0
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    except Exception:
+        prompt_cost = completion_cost = 0.0
+    return prompt_tokens, completion_tokens, prompt_cost + completion_cost
+
+
+_export_lock = threading.Lock()
+
+
+def export_run(run: RunMetrics) -> None:
+    log_path = os.getenv("METRICS_LOG_PATH")
+    if not log_path:
+        return
+    # Metrics are best effort: a full disk or an unwritable path is logged, never raised into the run
+    try:
+        with _export_lock:
+            if os.path.dirname(log_path):
+                os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(run.to_dict()) + "\n")
+            prometheus_path = os.getenv("METRICS_PROMETHEUS_PATH")
+            if prometheus_path:
+                write_prometheus(prometheus_path, load_runs(log_path), job_queue_stats())
+    except OSError:
+        logger.warning("Could not export metrics for run %s", run.run_id, exc_info=True)
+
+
+def job_queue_stats() -> Optional[Dict[str, float]]:
+    """The job queue's stats, or None when no queue has been created."""
+    from job_queue import get_job_queue, job_queue_path
+
+    if not os.path.exists(job_queue_path()):
+        return None
+    return get_job_queue().stats()
+
+
+def load_runs(path: str, limit: int = RUN_WINDOW) -> List[Dict[str, Any]]:
+    """The most recent `limit` runs from a JSONL log. Reads backwards from the end of the file,
+    so the cost stays the same as the log grows."""
+    if limit <= 0 or not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0 and data.count(b"\n") <= limit:
+            step = min(_TAIL_BLOCK_BYTES, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.split(b"\n")
+    # The last piece is empty, or a line another process is still appending; when the read
+    # stopped short of the start of the file, the first piece is the tail of an older line
+    lines = lines[1 if position > 0 else 0:-1]
+    runs = []
+    for line in lines[-limit:]:
+        try:
+            runs.append(json.loads(line))
+        except ValueError:
+            # A process killed halfway through appending leaves a broken line; the rest still count
+            continue
+    return runs
+
+
+def quantile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_prometheus(runs: Sequence[Dict[str, Any]], queue_stats: Optional[Dict[str, float]] = None,
+                      window_size: int = RUN_WINDOW) -> str:
+    """Aggregates runs into Prometheus text exposition format, with p50/p95 per stage, plus
+    job queue gauges when `queue_stats` (from JobQueue.stats) is given. `runs` are the last
+    `window_size` logged runs, which the series are named after; they are gauges, since a value
+    drops as old runs leave the window."""
+    run_seconds: Dict[str, List[float]] = {}
+    stage_seconds: Dict[Tuple[str, str], List[float]] = {}
+    counters: Dict[str, Dict[Tuple[str, str], float]] = {
+        "llm_calls": {}, "cache_hits": {}, "retries": {}, "prompt_tokens": {}, "completion_tokens": {}, "cost_usd": {},
+        "context_tokens": {}, "context_tokens_saved": {}, "coalesced_calls": {}, "throttle_seconds": {}, "rate_limited": {},
+    }
+    for run in runs:
+        kind = run["kind"]
+        if run.get("wall_seconds") is not None:
+            run_seconds.setdefault(kind, []).append(run["wall_seconds"])
+        for stage in run["stages"]:
+            key = (kind, stage["stage"])
+            if stage["wall_seconds"]:
+                stage_seconds.setdefault(key, []).append(stage["wall_seconds"])
+            for name, values in counters.items():
+                # .get: runs logged before a counter existed do not have it
+                values[key] = values.get(key, 0) + stage.get(name, 0)
+
+    window = f"last_{window_size}_runs"
+    lines = [
+        f"# HELP {METRIC_PREFIX}_{window} Runs in the window the other run series are computed over.",
+        f"# TYPE {METRIC_PREFIX}_{window} gauge",
+    ]
+    for kind, values in sorted(run_seconds.items()):
+        lines.append(f'{METRIC_PREFIX}_{window}{{kind="{_label(kind)}"}} {len(values)}')
+
+    lines += [
+        f"# HELP {METRIC_PREFIX}_run_seconds_{window} Wall time per run.",
+        f"# TYPE {METRIC_PREFIX}_run_seconds_{window} gauge",
+    ]
+    for kind, values in sorted(run_seconds.items()):
+        for q in QUANTILES:
+            lines.append(f'{METRIC_PREFIX}_run_seconds_{window}{{kind="{_label(kind)}",quantile="{q}"}} {quantile(values, q):.6f}')
+
+    lines += [
+        f"# HELP {METRIC_PREFIX}_stage_seconds_{window} Wall time per stage.",
+        f"# TYPE {METRIC_PREFIX}_stage_seconds_{window} gauge",
+    ]
+    for (kind, stage), values in sorted(stage_seconds.items()):
+        labels = f'kind="{_label(kind)}",stage="{_label(stage)}"'
+        for q in QUANTILES:
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_{window}{{{labels},quantile="{q}"}} {quantile(values, q):.6f}')
+
+    for name, values in counters.items():
+        metric = f"{METRIC_PREFIX}_stage_{name}_{window}"
+        lines += [f"# HELP {metric} {name.replace('_', ' ').capitalize()} per stage, summed over the window.", f"# TYPE {metric} gauge"]
+        for (kind, stage), value in sorted(values.items()):
+            lines.append(f'{metric}{{kind="{_label(kind)}",stage="{_label(stage)}"}} {value:g}')
+    if queue_stats is not None:
+        lines += render_queue_metrics(queue_stats)
+    return "\n".join(lines) + "\n"
+
+
+def render_queue_metrics(stats: Dict[str, float]) -> List[str]:
+    from job_queue import STATUSES
+
+    lines = [f"# HELP {METRIC_PREFIX}_jobs Jobs in the job queue by status.", f"# TYPE {METRIC_PREFIX}_jobs gauge"]
+    for status in STATUSES:
+        lines.append(f'{METRIC_PREFIX}_jobs{{status="{status}"}} {stats[status]:g}')
+    lines += [
+        f"# HELP {METRIC_PREFIX}_job_queue_oldest_seconds Age of the oldest queued job.",
+        f"# TYPE {METRIC_PREFIX}_job_queue_oldest_seconds gauge",
+        f"{METRIC_PREFIX}_job_queue_oldest_seconds {stats['oldest_queued_seconds']:.6f}",
+    ]
+    for name, help_text in (("wait", "Time jobs finished in the last hour spent queued."), ("run", "Run time of jobs finished in the last hour.")):
+        metric = f"{METRIC_PREFIX}_job_{name}_seconds"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for q in QUANTILES:
+            lines.append(f'{metric}{{quantile="{q}"}} {stats[f"{name}_seconds_p{round(q * 100)}"]:.6f}')
+    return lines
+
+
+def write_prometheus(path: str, runs: Sequence[Dict[str, Any]], queue_stats: Optional[Dict[str, float]] = None) -> None:
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so a scraper never reads a half-written file. The temporary name is unique,
+    # so worker processes exporting at the same time do not write into each other's file.
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path) or ".",
+                                     prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False) as f:
+        f.write(render_prometheus(runs, queue_stats))
+    try:
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Print aggregated run metrics in Prometheus text format.")
+    parser.add_argument("--log", default=os.getenv("METRICS_LOG_PATH", ".metrics/runs.jsonl"), help="JSONL run log to aggregate.")
+    parser.add_argument("--limit", type=int, default=RUN_WINDOW, help="How many of the most recent runs to include.")
+    args = parser.parse_args(argv)
+    print(render_prometheus(load_runs(args.log, args.limit), job_queue_stats(), args.limit), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+from crewai import Agent, Task
+from crewai.tasks.output_format import OutputFormat
+from crewai.tasks.task_output import TaskOutput
+from dataclasses import dataclass, field
+from pydantic import BaseModel
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Type
+import functools
+import litellm
+import os
+from agent_llm import AgentLLM
+from context_builder import resume_prompt_text
+from crew_scheduler import execute_task, stage_name
+from match_scorer import MatchScore, score_match
+from models import ResumeDetails, JobDescriptionDetails
+from profile_store import ProfileStore, job_description_key, resume_key
+from structured_extraction import ExtractionError, ExtractionResult, extract
+
+# Agent and task definitions shared by the Streamlit app and the batch runner.
+
+
+def configure_llm() -> Optional[str]:
+    """Registers the configured Gemini model with litellm and returns the identifier agents should use."""
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        return None
+    target_llm_model = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash-latest")
+    _register_gemini_model(target_llm_model, gemini_api_key)
+    return f"gemini/{target_llm_model}"
+
+
+@functools.lru_cache(maxsize=None)
+def _register_gemini_model(target_llm_model: str, gemini_api_key: str) -> None:
+    # Once per model and key: the app calls configure_llm on every run
+    litellm.register_model({
+        "gemini/" + target_llm_model: {
+            "model_name": target_llm_model,
+            "litellm_provider": "gemini",
+            "api_key": gemini_api_key,
+            # Gemini models have a native JSON-schema output mode, used by structured extraction
+            "supports_response_schema": True,
+        }
+    })
+
+
+@dataclass
+class PipelineAgents:
+    resume_analyzer: Agent
+    job_description_analyzer: Agent
+    resume_tailoring_advisor: Agent
+    cover_letter_drafter: Agent
+    resume_editor: Agent
+    initial_match_analyzer: Agent
+    section_refiner: Agent
+
+
+@dataclass
+class PipelineTasks:
+    analyze_resume: Task
+    analyze_job_description: Task
+    initial_match_analysis: Task
+    tailor_resume_advice: Task
+    edit_resume: Task
+    draft_cover_letter: Task
+    # Filled in by `match_analysis_gate` once both analyses are available
+    local_match_score: Optional[MatchScore] = None
+    # Analyses produced by `structured_executor`, by stage name
+    extractions: Dict[str, ExtractionResult] = field(default_factory=dict)
+
+    def all(self) -> List[Task]:
+        return [self.analyze_resume, self.analyze_job_description, self.initial_match_analysis,
+                self.tailor_resume_advice, self.edit_resume, self.draft_cover_letter]
+
+    def pending(self) -> List[Task]:
+        """The tasks that still have to run: everything without an output, so a shared resume
+        analysis or analyses restored from the profile store are left out."""
+        return [task for task in self.all() if task.output is None]
+
+    def score_locally(self) -> Optional[MatchScore]:
+        resume = self.analyze_resume.output.pydantic if self.analyze_resume.output else None
+        jd = self.analyze_job_description.output.pydantic if self.analyze_job_description.output else None
+        if resume is None or jd is None:
+            return None
+        self.local_match_score = score_match(resume, jd)
+        return self.local_match_score
+
+
+def build_agents(llm_identifier: str, verbose: bool = True) -> PipelineAgents:
+    resume_analyzer_agent = Agent(
+        role='Resume Analyzer',
+        goal='Extract and understand the key skills, experiences (including roles, responsibilities, achievements), education, and qualifications from the provided resume text.',
+        backstory='An expert HR professional skilled in quickly identifying candidate strengths and qualifications from diverse resume formats.',
+        llm=AgentLLM(llm_identifier, role='Resume Analyzer'),
+        verbose=verbose,
+        allow_delegation=False
+    )
+
+    job_description_analyzer_agent = Agent(
+        role='Job Description Deconstructor',
+        goal='Thoroughly analyze the provided job description to identify key requirements, essential skills (technical and soft), desired qualifications, company culture hints, and the core responsibilities of the role.',
+        backstory='A meticulous analyst specializing in deconstructing job postings to pinpoint exactly what employers are seeking in an ideal candidate.',
+        llm=AgentLLM(llm_identifier, role='Job Description Deconstructor'),
+        verbose=verbose,
+        allow_delegation=False
+    )
+
+    resume_tailoring_advisor_agent = Agent(
+        role='Strategic Resume Tailoring Advisor',
+        goal='Compare the candidate\'s analyzed resume against the analyzed job description. Provide specific, actionable advice on how to tailor the resume to best match the job requirements. This includes suggesting keywords, highlighting relevant experiences, and bridging any apparent gaps.',
+        backstory='A seasoned career coach with a strong track record of helping job seekers optimize their resumes to stand out by perfectly aligning them with specific job opportunities.',
+        llm=AgentLLM(llm_identifier, role='Strategic Resume Tailoring Advisor'),
+        verbose=verbose,
+        allow_delegation=False
+    )
+
+    cover_letter_drafter_agent = Agent(
+        role='Persuasive Cover Letter Drafter',
+        goal='Draft a compelling and personalized cover letter. The letter must highlight the candidate\'s most relevant skills and experiences (from their resume analysis) and directly address the requirements outlined in the job description analysis. The tone should be professional, enthusiastic, and tailored to the specific company and role.',
+        backstory='A skilled writer and communication expert specializing in crafting persuasive cover letters that capture attention and make candidates memorable.',
+        llm=AgentLLM(llm_identifier, role='Persuasive Cover Letter Drafter', stream_output=True),
+        verbose=verbose,
+        allow_delegation=False
+    )
+
+    resume_editor_agent = Agent(
+        role='Expert Resume Editor',
+        goal='Rewrite and reformat the provided resume text based on specific tailoring advice to perfectly align it with a given job description. The output should be the full text of the revised resume.',
+        backstory='A meticulous resume writer with a talent for transforming standard resumes into compelling, job-specific documents that highlight a candidate\'s strengths and experiences in the context of a particular role.',
+        llm=AgentLLM(llm_identifier, role='Expert Resume Editor', stream_output=True),
+        verbose=verbose,
+        allow_delegation=False
+    )
+
+    initial_match_analyzer_agent = Agent(
+        role='Initial Resume-JD Match Analyzer',
+        goal="Provide a quick, high-level assessment of how well a candidate's resume (ResumeDetails JSON) matches a job description (JobDescriptionDetails JSON). Output a qualitative match level (e.g., Strong, Moderate, Needs Improvement) and 2-3 key points highlighting strengths or gaps.",
+        backstory="An efficient HR screener adept at quickly identifying the initial fit between a resume and a job posting based on structured data.",
+        llm=AgentLLM(llm_identifier, role='Initial Resume-JD Match Analyzer'),
+        verbose=verbose,
+        allow_delegation=False
+    )
+
+    section_refiner_agent = Agent(
+        role='Resume Section Refinement Specialist',
+        goal="Rewrite a specific section of a resume based on a user's explicit instruction to improve its impact, clarity, or focus. The output should be only the refined text for that section.",
+        backstory="A detail-oriented editor skilled at making targeted improvements to resume content, ensuring each part is as effective as possible.",
+        llm=AgentLLM(llm_identifier, role='Resume Section Refinement Specialist'),
+        verbose=verbose,
+        allow_delegation=False
+    )
+
+    return PipelineAgents(
+        resume_analyzer=resume_analyzer_agent,
+        job_description_analyzer=job_description_analyzer_agent,
+        resume_tailoring_advisor=resume_tailoring_advisor_agent,
+        cover_letter_drafter=cover_letter_drafter_agent,
+        resume_editor=resume_editor_agent,
+        initial_match_analyzer=initial_match_analyzer_agent,
+        section_refiner=section_refiner_agent,
+    )
+
+
+def build_resume_task(agents: PipelineAgents, resume_text: str) -> Task:
+    resume_text = resume_prompt_text(resume_text, agents.resume_analyzer.role, agents.resume_analyzer.llm.model)
+    task_analyze_resume = Task(
+        description=f"Analyze the following resume text. Extract key information such as work experience (roles, companies, dates, responsibilities, achievements), skills (technical and soft), education (degree, institution, graduation date), and any projects or certifications. Present this as a structured summary.\n\nResume Text:\n```\n{resume_text}\n```",
+        expected_output="A JSON object conforming to the ResumeDetails Pydantic model. Ensure all fields are accurately populated based on the resume content. For work experiences, list each role with company, duration, and key achievements/responsibilities as a list of strings.",
+        agent=agents.resume_analyzer,
+        output_pydantic=ResumeDetails
+    )
+    return task_analyze_resume
+
+
+def build_tasks(agents: PipelineAgents, resume_text: str, job_description: str, task_analyze_resume: Optional[Task] = None) -> PipelineTasks:
+    """Builds the six-task pipeline. Pass an already executed `task_analyze_resume` to reuse
+    its output for another job description instead of analyzing the resume again."""
+    if task_analyze_resume is None:
+        task_analyze_resume = build_resume_task(agents, resume_text)
+
+    task_analyze_job_description = Task(
+        description=f"Analyze the following job description. Identify and list the key requirements, essential technical skills, desired soft skills, educational qualifications, years of experience needed, company values or culture hints (if mentioned), and the main responsibilities of the role.\n\nJob Description:\n```\n{job_description}\n```",
+        expected_output="A JSON object conforming to the JobDescriptionDetails Pydantic model. Populate all fields based on the provided job description, ensuring lists are used where appropriate (e.g., for skills, responsibilities).",
+        agent=agents.job_description_analyzer,
+        output_pydantic=JobDescriptionDetails
+    )
+
+    task_initial_match_analysis = Task(
+        description="Based on the structured ResumeDetails (JSON) and JobDescriptionDetails (JSON) from the previous tasks, provide a brief, high-level analysis of the initial match. State a qualitative match level (e.g., 'Strong Match', 'Moderate Match', 'Needs Significant Tailoring') and list 2-3 bullet points identifying key strengths or major gaps. Keep the assessment concise.",
+        expected_output="A short paragraph stating the match level, followed by 2-3 bullet points. For example: 'Initial Assessment: Moderate Match. \n- Strength: Relevant experience in X. \n- Gap: Missing explicit mention of Y skill required by JD.'",
+        agent=agents.initial_match_analyzer,
+        context=[task_analyze_resume, task_analyze_job_description]
+    )
+
+    task_tailor_resume_advice = Task(
+        description=f"You will receive structured information: the candidate's resume details (as a JSON object conforming to ResumeDetails model) and the job description details (as a JSON object conforming to JobDescriptionDetails model) from previous analysis tasks. Your task is to compare these two. Based on this comparison, provide specific, actionable advice on how to tailor the resume to best match the job requirements. Your advice should be a list of bullet points covering: \n1. Keywords from the JobDescriptionDetails (e.g., from 'must_have_skills', 'key_responsibilities') that should be incorporated into the resume. \n2. Specific skills and experiences from the ResumeDetails (e.g., from 'work_experiences', 'skills') that should be emphasized or elaborated on to match the JobDescriptionDetails. \n3. Any potential gaps between the ResumeDetails and JobDescriptionDetails and how they might be addressed (e.g., highlighting transferable skills). \n4. Suggestions for rephrasing certain points in the resume for better alignment.",
+        expected_output="A clear, bulleted list of actionable recommendations for tailoring the resume. Each recommendation should be specific and justified by referencing parts of the job description or resume.",
+        agent=agents.resume_tailoring_advisor,
+        context=[task_analyze_resume, task_analyze_job_description]
+    )
+
+    task_draft_cover_letter = Task(
+        description="Using the analyzed resume, the analyzed job description, and the resume tailoring advice (all from context), draft a professional and engaging cover letter. The letter should: \n1. Clearly state the position being applied for. \n2. Briefly introduce the candidate. \n3. Highlight 2-3 key qualifications and experiences from the resume that directly align with the most important requirements of the job description. \n4. Express enthusiasm for the role and the company. \n5. End with a clear call to action. \nEnsure the tone is professional and tailored.",
+        expected_output="A complete, well-structured draft of a cover letter. It should include a salutation, an introduction, body paragraphs (2-3) demonstrating suitability by referencing specific details from the contextual ResumeDetails (JSON) and JobDescriptionDetails (JSON), and a professional closing. The letter should be ready to be slightly edited and sent by the user.",
+        agent=agents.cover_letter_drafter,
+        context=[task_analyze_resume, task_analyze_job_description, task_tailor_resume_advice]
+    )
+
+    task_edit_resume = Task(
+        description="You are provided with the original resume text, the analysis of the job description, and specific tailoring advice. Your goal is to rewrite the *original* resume text by carefully integrating *all* the specific suggestions from the tailoring advice. Maintain the overall structure and sections of the original resume (e.g., Contact Information, Summary/Objective, Experience, Education, Skills). For each work experience entry, revise the bullet points to incorporate keywords and highlight achievements relevant to the job description, as suggested by the tailoring advice. Ensure consistent formatting using clear headings and bullet points (using '*' or '-'). The final output must be the complete, tailored resume text, professionally formatted, in plain text, ready for copy-pasting, with no markdown syntax.",
+        expected_output="The complete, tailored resume text in PLAIN TEXT format. It should be a revised version of the original resume, incorporating the tailoring advice, maintaining a standard resume structure with clear sections and bullet points, and containing NO MARKDOWN formatting whatsoever.",
+        agent=agents.resume_editor,
+        context=[task_analyze_resume, task_analyze_job_description, task_tailor_resume_advice]
+    )
+
+    return PipelineTasks(
+        analyze_resume=task_analyze_resume,
+        analyze_job_description=task_analyze_job_description,
+        initial_match_analysis=task_initial_match_analysis,
+        tailor_resume_advice=task_tailor_resume_advice,
+        edit_resume=task_edit_resume,
+        draft_cover_letter=task_draft_cover_letter,
+    )
+
+
+def build_refinement_task(agents: PipelineAgents, section: str, instruction: str) -> Task:
+    task_refine_specific_section = Task(
+        description=f"The user has provided the following resume section:\n```\n{section}\n```\nAnd wants it refined with this instruction: '{instruction}'.\nRewrite the provided resume section based *only* on this instruction. Output *only* the refined section text.",
+        expected_output="The refined text of the resume section, directly addressing the user's instruction. Output only the modified section, not any surrounding text or explanation.",
+        agent=agents.section_refiner
+    )
+    return task_refine_specific_section
+
+
+def _analyses(tasks: PipelineTasks, resume_text: str, job_description: str) -> Iterator[Tuple[Task, Type[BaseModel], str]]:
+    if resume_text:
+        yield tasks.analyze_resume, ResumeDetails, resume_key(resume_text)
+    if job_description:
+        yield tasks.analyze_job_description, JobDescriptionDetails, job_description_key(job_description)
+
+
+def restore_analyses(tasks: PipelineTasks, resume_text: str, job_description: str, store: Optional[ProfileStore]) -> List[str]:
+    """Completes the analysis tasks whose result `store` already holds, so they are not scheduled
+    and their dependents get the stored JSON as context. Returns the names of the restored stages."""
+    restored = []
+    if store is None:
+        return restored
+    for task, model_cls, key in _analyses(tasks, resume_text, job_description):
+        if task.output is not None:
+            continue
+        model = store.get(model_cls, key)
+        if model is None:
+            continue
+        task.output = _completed_output(task, model)
+        restored.append(stage_name(task))
+    return restored
+
+
+def _completed_output(task: Task, model: BaseModel) -> TaskOutput:
+    return TaskOutput(
+        description=task.description,
+        name=task.name,
+        expected_output=task.expected_output,
+        raw=model.model_dump_json(),
+        pydantic=model,
+        agent=task.agent.role,
+        output_format=OutputFormat.PYDANTIC,
+    )
+
+
+def save_analyses(tasks: PipelineTasks, resume_text: str, job_description: str, store: Optional[ProfileStore]) -> None:
+    """Stores the analyses that were parsed into their pydantic models."""
+    if store is None:
+        return
+    for task, model_cls, key in _analyses(tasks, resume_text, job_description):
+        if task.output is not None and isinstance(task.output.pydantic, model_cls):
+            store.put(key, task.output.pydantic)
+
+
+def structured_executor(tasks: PipelineTasks, mode: str) -> Callable[[Task, str], None]:
+    """Returns an `execute` hook for `run_task_graph`.
+
+    mode "native" runs the two analysis tasks as single-call structured extractions (see
+    structured_extraction.py) and records them in `tasks.extractions`; if an extraction still
+    fails after its re-asks, the task runs through crewai as usual. mode "crewai" runs every task
+    through crewai.
+    """
+    structured = {id(tasks.analyze_resume): ResumeDetails, id(tasks.analyze_job_description): JobDescriptionDetails}
+
+    def execute(task: Task, context: str) -> None:
+        model_cls = structured.get(id(task))
+        if mode != "native" or model_cls is None:
+            return execute_task(task, context)
+        agent = task.agent
+        user_prompt = f"{task.description}\n\nExpected output: {task.expected_output}"
+        if context:
+            user_prompt += f"\n\nContext:\n{context}"
+        try:
+            result = extract(agent.llm, model_cls, f"You are {agent.role}. {agent.backstory}\nYour personal goal is: {agent.goal}", user_prompt)
+        except ExtractionError as e:
+            if e.result is not None:
+                tasks.extractions[stage_name(task)] = e.result
+            return execute_task(task, context)
+        task.output = _completed_output(task, result.model)
+        tasks.extractions[stage_name(task)] = result
+
+    return execute
+
+
+def match_analysis_gate(tasks: PipelineTasks, mode: str) -> Callable[[Task], bool]:
+    """Returns a `should_run` predicate for `run_task_graph` that scores the match locally
+    before the LLM match analysis runs.
+
+    mode "llm" always runs the LLM analysis, "local" never does, and "borderline" runs it only
+    when the local score is too close to call. If the analyses could not be parsed into their
+    pydantic models there is nothing to score, so the LLM analysis runs.
+    """
+    def should_run(task: Task) -> bool:
+        if task is not tasks.initial_match_analysis:
+            return True
+        match_score = tasks.score_locally()
+        if match_score is None or mode == "llm":
+            return True
+        return mode == "borderline" and match_score.is_borderline()
+
+    return should_run
+
+
+def application_outputs(tasks: PipelineTasks) -> Dict[str, str]:
+    """The texts the app shows once the pipeline has run, keyed like its session state."""
+    local_match = tasks.local_match_score or tasks.score_locally()
+    return {
+        "initial_match_assessment": "\n\n".join(
+            part for part in (
+                local_match.format_markdown() if local_match else "",
+                str(tasks.initial_match_analysis.output) if tasks.initial_match_analysis.output else "",
+            ) if part
+        ),
+        "advice_output_display": str(tasks.tailor_resume_advice.output) if tasks.tailor_resume_advice.output else "",
+        "tailored_resume_output": str(tasks.edit_resume.output) if tasks.edit_resume.output else "",
+        "cover_letter_output": str(tasks.draft_cover_letter.output) if tasks.draft_cover_letter.output else "",
+    }
+
+
+def format_run_report(tasks: PipelineTasks, restored_stages: List[str], schedule_result=None,
+                      first_token_seconds: Optional[Dict[str, float]] = None, run_metrics=None) -> str:
+    """The "Stage timings" text: schedule, structured extractions, reused analyses, time to the
+    first streamed output and the run's metrics, for whichever of them are available."""
+    lines = [schedule_result.format_report()] if schedule_result is not None else []
+    if tasks.extractions:
+        lines.append("Structured extraction: " + ", ".join(f"{stage} {result.describe()}" for stage, result in tasks.extractions.items()))
+    if restored_stages:
+        lines.append("Reused stored analyses: " + ", ".join(restored_stages))
+    if first_token_seconds:
+        lines.append("First streamed output: " + ", ".join(f"{role} +{seconds:.2f}s" for role, seconds in first_token_seconds.items()))
+    if run_metrics is not None:
+        lines.append(run_metrics.format_report())
+    return "\n".join(lines).strip()
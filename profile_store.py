@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+
+# Persistent store of structured analyses, so a resume (or job description) seen before does not
+# pay for the same extraction call again. Entries are keyed by a hash of the text and tagged
+# with a hash of the model's JSON schema; when a model in models.py changes, old entries stop
+# matching and are replaced the next time that text is analyzed.
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def schema_version(model_cls: Type[BaseModel]) -> str:
+    schema = json.dumps(model_cls.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+def resume_key(resume_text: str) -> str:
+    return hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+
+
+def normalize_job_description(text: str) -> str:
+    # Pasted job descriptions differ mostly in whitespace and line endings
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def job_description_key(job_description: str) -> str:
+    return hashlib.sha256(normalize_job_description(job_description).encode("utf-8")).hexdigest()
+
+
+class ProfileStore:
+    """SQLite store of validated pydantic models by content key, with LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, schema_version TEXT NOT NULL, payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_access REAL NOT NULL, PRIMARY KEY (kind, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS profiles_last_access ON profiles (last_access)")
+        self._conn.commit()
+
+    def get(self, model_cls: Type[Model], key: str) -> Optional[Model]:
+        kind = model_cls.__name__
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM profiles WHERE kind = ? AND key = ? AND schema_version = ?",
+                (kind, key, schema_version(model_cls)),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            try:
+                model = model_cls.model_validate_json(row[0])
+            except ValidationError:
+                self._conn.execute("DELETE FROM profiles WHERE kind = ? AND key = ?", (kind, key))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE profiles SET last_access = ? WHERE kind = ? AND key = ?", (time.time(), kind, key))
+            self._conn.commit()
+            self.hits += 1
+            return model
+
+    def put(self, key: str, model: BaseModel) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (kind, key, schema_version, payload, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (type(model).__name__, key, schema_version(type(model)), model.model_dump_json(), now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM profiles WHERE rowid IN (SELECT rowid FROM profiles ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM profiles")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+_profile_store: Optional[ProfileStore] = None
+_profile_store_lock = threading.Lock()
+
+
+def get_profile_store() -> Optional[ProfileStore]:
+    """Returns the process-wide store, or None unless PROFILE_STORE_PATH is set (the store is opt-in)."""
+    global _profile_store
+    path = os.getenv("PROFILE_STORE_PATH")
+    if not path:
+        return None
+    with _profile_store_lock:
+        if _profile_store is None or _profile_store.path != path:
+            _profile_store = ProfileStore(path, max_entries=int(os.getenv("PROFILE_STORE_MAX_ENTRIES", "1000")))
+        return _profile_store
@@ -0,0 +1,252 @@
+import json
+import re
+import typing
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type
+from pydantic import BaseModel, ValidationError
+from agent_llm import AgentLLM
+
+# Single-call extraction of the structured analyses. The model's JSON schema goes to the
+# provider's native structured-output mode (response_format), or into the prompt when the model
+# has none. The reply is validated with pydantic; common defects (code fences, trailing commas,
+# truncated brackets, missing optional fields, a string where a list belongs) are repaired
+# locally, and only what cannot be repaired costs a re-ask.
+
+MAX_REASKS = 2
+
+
+@dataclass
+class ExtractionResult:
+    # None when the extraction failed and the task fell back to crewai
+    model: Optional[BaseModel]
+    raw: str
+    calls: int
+    native_schema: bool
+    repaired_locally: bool
+    # Calls crewai's output_pydantic flow would likely have made for the same first reply,
+    # estimated from whether crewai's own validation accepts it; crewai is not actually run
+    estimated_crewai_calls: int = 1
+    fell_back: bool = False
+
+    @property
+    def estimated_calls_saved(self) -> int:
+        """Model calls avoided against the estimate for crewai's path; negative when re-asks cost
+        more. After a fallback crewai makes its own calls anyway, so every call made here was
+        wasted. bench_extraction measures the real difference."""
+        return -self.calls if self.fell_back else self.estimated_crewai_calls - self.calls
+
+    def describe(self) -> str:
+        mode = "native schema" if self.native_schema else "schema in prompt"
+        if self.fell_back:
+            return f"{self.calls} calls ({mode}), fell back to crewai, {self.estimated_calls_saved} saved"
+        repaired = ", repaired locally" if self.repaired_locally else ""
+        return (f"{self.calls} call{'s' if self.calls != 1 else ''} ({mode}{repaired}, "
+                f"est. {self.estimated_calls_saved} saved against crewai's ~{self.estimated_crewai_calls})")
+
+
+class ExtractionError(Exception):
+    def __init__(self, message: str, result: Optional[ExtractionResult] = None):
+        super().__init__(message)
+        # Set when extract() gives up, to account for the calls it made
+        self.result = result
+
+
+# --- Schema ---
+
+def _inline_refs(node: Any, defs: Dict[str, Any]) -> Any:
+    if isinstance(node, dict):
+        if "$ref" in node:
+            return _inline_refs(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+        return {k: _inline_refs(v, defs) for k, v in node.items() if k != "$defs"}
+    if isinstance(node, list):
+        return [_inline_refs(v, defs) for v in node]
+    return node
+
+
+def json_schema(model_cls: Type[BaseModel]) -> Dict[str, Any]:
+    """The model's JSON schema with `$ref`s inlined, which not every provider resolves."""
+    schema = model_cls.model_json_schema()
+    return _inline_refs(schema, schema.get("$defs", {}))
+
+
+def supports_native_schema(model: str) -> bool:
+    import litellm
+
+    try:
+        return bool(litellm.supports_response_schema(model=model))
+    except Exception:
+        return False
+
+
+# --- Local repair ---
+
+def _json_text(text: str) -> str:
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    start = text.find("{")
+    if start < 0:
+        raise ExtractionError("The reply contains no JSON object.")
+    end = text.rfind("}")
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def _close_brackets(text: str) -> str:
+    # Closes strings, arrays and objects left open by a truncated reply
+    stack: List[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    return text + ('"' if in_string else "") + "".join(reversed(stack))
+
+
+# Python literals outside JSON strings; strings are matched first so their contents are kept
+_PYTHON_LITERAL = re.compile(r'("(?:[^"\\]|\\.)*")|\b(True|False|None)\b')
+_JSON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def parse_json(text: str) -> Any:
+    """Parses the JSON object in a reply, repairing fences, trailing commas and truncation."""
+    candidate = _json_text(text)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    candidate = _close_brackets(candidate)
+    candidate = re.sub(r",\s*([}\]])", r"\1", candidate)
+    candidate = _PYTHON_LITERAL.sub(lambda m: m.group(1) or _JSON_LITERALS[m.group(2)], candidate)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError as e:
+        raise ExtractionError(f"The reply is not valid JSON: {e}") from e
+
+
+def _allows_none(annotation: Any) -> bool:
+    return typing.get_origin(annotation) is typing.Union and type(None) in typing.get_args(annotation)
+
+
+def _strip_optional(annotation: Any) -> Any:
+    if _allows_none(annotation):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return args[0] if len(args) == 1 else annotation
+    return annotation
+
+
+def _coerce(value: Any, annotation: Any, split_commas: bool = False) -> Any:
+    annotation = _strip_optional(annotation)
+    origin = typing.get_origin(annotation)
+    if origin in (list, List):
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        if value is None:
+            return []
+        if isinstance(value, str):
+            value = [part.strip() for part in re.split(r"\n|;|•|," if split_commas else r"\n|;|•", value) if part.strip()]
+        if isinstance(value, list):
+            return [_coerce(item, item_type) for item in value]
+        return value
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return repair_fields(value, annotation) if isinstance(value, dict) else value
+    if annotation is str:
+        if isinstance(value, list):
+            return ", ".join(str(item) for item in value)
+        if isinstance(value, (int, float)):
+            return str(value)
+    return value
+
+
+def repair_fields(data: Dict[str, Any], model_cls: Type[BaseModel]) -> Dict[str, Any]:
+    """Fills fields the model may leave out (optional ones with None, lists with []) and coerces
+    values to the shape the model declares."""
+    repaired = dict(data)
+    for name, field in model_cls.model_fields.items():
+        if name not in repaired:
+            if _allows_none(field.annotation):
+                repaired[name] = None
+            elif typing.get_origin(field.annotation) in (list, List):
+                repaired[name] = []
+            continue
+        # Skill lists come back as "Python, AWS, Kubernetes"; other lists hold sentences with commas
+        repaired[name] = _coerce(repaired[name], field.annotation, split_commas=name.endswith("skills"))
+    return repaired
+
+
+def _estimate_crewai_calls(reply: str, model_cls: Type[BaseModel]) -> int:
+    # crewai's convert_to_model validates the reply, or the outermost {...} in it, as it is, and
+    # asks its converter for another call when that fails
+    match = re.search(r"\{.*\}", reply, re.DOTALL)
+    for candidate in (reply, match.group() if match else None):
+        if candidate is None:
+            continue
+        try:
+            model_cls.model_validate_json(candidate)
+            return 1
+        except ValidationError:
+            pass
+    return 2
+
+
+def validate_reply(text: str, model_cls: Type[BaseModel]):
+    """Returns (model, repaired) for a reply, or raises ExtractionError with what was wrong."""
+    try:
+        return model_cls.model_validate_json(text.strip()), False
+    except ValidationError:
+        pass
+    data = parse_json(text)
+    if not isinstance(data, dict):
+        raise ExtractionError("The reply is not a JSON object.")
+    try:
+        return model_cls.model_validate(repair_fields(data, model_cls)), True
+    except ValidationError as e:
+        raise ExtractionError(str(e)) from e
+
+
+# --- Extraction ---
+
+def extract(llm: AgentLLM, model_cls: Type[BaseModel], system_prompt: str, user_prompt: str) -> ExtractionResult:
+    """Extracts `model_cls` in one call where possible, re-asking at most MAX_REASKS times with
+    the validation error when the reply cannot be repaired."""
+    native = supports_native_schema(llm.model)
+    if native:
+        # litellm turns the model class into the provider's schema parameter
+        response_format = model_cls
+        instruction = "Respond with a single JSON object."
+    else:
+        response_format = None
+        instruction = f"Respond with only a JSON object that conforms to this JSON schema:\n{json.dumps(json_schema(model_cls))}"
+    extraction_llm = AgentLLM(llm.model, role=llm.role, **{**llm.sampling_params(), "response_format": response_format})
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"{user_prompt}\n\n{instruction}"},
+    ]
+    estimated_crewai_calls = None
+    for attempt in range(MAX_REASKS + 1):
+        reply = extraction_llm.call(messages)
+        if isinstance(reply, BaseModel):
+            reply = reply.model_dump_json()
+        if estimated_crewai_calls is None:
+            estimated_crewai_calls = _estimate_crewai_calls(reply, model_cls)
+        try:
+            model, repaired = validate_reply(reply, model_cls)
+            return ExtractionResult(model=model, raw=model.model_dump_json(), calls=attempt + 1,
+                                    native_schema=native, repaired_locally=repaired,
+                                    estimated_crewai_calls=estimated_crewai_calls)
+        except ExtractionError as e:
+            error = e
+        messages += [
+            {"role": "assistant", "content": reply},
+            {"role": "user", "content": f"That reply did not match the schema:\n{error}\nReply with the corrected JSON object only."},
+        ]
+    result = ExtractionResult(model=None, raw=reply, calls=MAX_REASKS + 1, native_schema=native,
+                              repaired_locally=False, estimated_crewai_calls=estimated_crewai_calls, fell_back=True)
+    raise ExtractionError(f"{model_cls.__name__} could not be extracted after {MAX_REASKS + 1} calls: {error}", result)